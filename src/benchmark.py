@@ -0,0 +1,179 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+# Keep pygame's import banner out of the JSON written to stdout
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from src.game.game import Game
+from src.utilities.file_manager import FileManager
+from src.utilities.level_generator import LevelGenerator
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PHASES = ("handle_events", "update", "draw")
+
+
+class ScriptedKeys:
+    """Key state for scripted frames; indexable by key code like pygame.key.get_pressed()."""
+
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+def scripted_keys(frame):
+    """Walk the player in a square, changing direction every second, and try the first ability every 90 frames."""
+    direction = (pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w)[(frame // 60) % 4]
+    pressed = {direction}
+    if frame % 90 == 0:
+        pressed.add(pygame.K_1)
+    return ScriptedKeys(pressed)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples):
+    values = sorted(sample * 1000.0 for sample in samples)
+    return {
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "mean_ms": sum(values) / len(values) if values else 0.0,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident memory of the process since it started, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_pass(level, frames, draw, vectorized_enemies, stream_radius, ai_lod, enemy_workers):
+    """Build a game on the level and time each phase of the given number of scripted frames."""
+    pass_start = start = time.perf_counter()
+    game = Game(vectorized_enemies=vectorized_enemies, map_data=level, stream_radius=stream_radius, ai_lod=ai_lod, enemy_workers=enemy_workers)
+    load_seconds = time.perf_counter() - start
+
+    timings = {phase: [] for phase in PHASES if draw or phase != "draw"}
+    ai_updates = 0
+    blit_calls = 0
+    first_frame_seconds = None
+    for frame in range(frames):
+        start = time.perf_counter()
+        game.handle_events()
+        after_events = time.perf_counter()
+        game.update(scripted_keys(frame))
+        after_update = time.perf_counter()
+        timings["handle_events"].append(after_events - start)
+        timings["update"].append(after_update - after_events)
+        if game.map.ai_scheduler is not None:
+            ai_updates += game.map.ai_scheduler.updated
+        if draw:
+            game.draw()
+            pygame.display.flip()
+            timings["draw"].append(time.perf_counter() - after_update)
+            blit_calls += game.map.render_queue.calls
+        if first_frame_seconds is None:
+            # From starting to load until the first frame was shown
+            first_frame_seconds = time.perf_counter() - pass_start
+
+    return {
+        "load_ms": load_seconds * 1000.0,
+        "first_frame_ms": first_frame_seconds * 1000.0 if first_frame_seconds is not None else None,
+        "phases": {phase: summarize(samples) for phase, samples in timings.items()},
+        "enemies_remaining": game.map.enemy_count(),
+        "enemies_active": len(game.map.enemies),
+        "enemy_updates_per_frame": ai_updates / frames if game.map.ai_scheduler is not None else float(len(game.map.enemies)),
+        "map_blit_calls_per_frame": blit_calls / frames if draw else None,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a stress level and time handle_events, update and draw")
+    parser.add_argument("--width", type=int, default=200, help="Level width in tiles")
+    parser.add_argument("--height", type=int, default=200, help="Level height in tiles")
+    parser.add_argument("--wall-density", type=float, default=0.1, help="Fraction of interior cells that are walls")
+    parser.add_argument("--enemies", type=int, default=200, help="Number of enemies")
+    parser.add_argument("--doors", type=int, default=20, help="Number of doors")
+    parser.add_argument("--frames", type=int, default=600, help="Scripted frames per pass")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for level generation")
+    parser.add_argument("--level", help="Benchmark this level from the data directory (e.g. level.json) instead of a generated one")
+    parser.add_argument("--vectorized-enemies", action="store_true", help="Update enemies with the NumPy enemy pool")
+    parser.add_argument("--enemy-workers", type=int, default=0, help="Simulate enemy movement in this many worker processes")
+    parser.add_argument("--stream-radius", type=int, default=2, help="Chunks around the player to keep instantiated; -1 loads the whole map")
+    parser.add_argument("--no-ai-lod", action="store_true", help="Update every enemy every tick instead of by distance to the player")
+    parser.add_argument("--window", action="store_true", help="Draw to a real window instead of the dummy video driver")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.window:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    start = time.perf_counter()
+    if args.level:
+        level = FileManager.load_level(args.level)
+        if level is None:
+            sys.exit(1)
+    else:
+        level = LevelGenerator(args.width, args.height, args.wall_density, args.enemies, args.doors, args.seed).generate()
+    generate_seconds = time.perf_counter() - start
+
+    results = {
+        "config": {
+            "level": args.level, "width": args.width, "height": args.height, "wall_density": args.wall_density,
+            "enemies": args.enemies, "doors": args.doors, "frames": args.frames, "seed": args.seed,
+            "vectorized_enemies": args.vectorized_enemies, "stream_radius": args.stream_radius,
+            "ai_lod": not args.no_ai_lod, "enemy_workers": args.enemy_workers,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER", "default"),
+        },
+        "generate_ms": generate_seconds * 1000.0,
+    }
+    stream_radius = None if args.stream_radius < 0 else args.stream_radius
+    # Keep stdout clean for the JSON output; loading logs go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        results["with_draw"] = run_pass(level, args.frames, True, args.vectorized_enemies, stream_radius, not args.no_ai_lod, args.enemy_workers)
+        results["without_draw"] = run_pass(level, args.frames, False, args.vectorized_enemies, stream_radius, not args.no_ai_lod, args.enemy_workers)
+    # The peak never goes down within a process, so it covers both passes and is reported once
+    results["run_peak_rss_mb"] = peak_rss_mb()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+        print(f"Benchmark results saved to '{args.output}'")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,17 @@ class Ability:
         self.melee = melee
         self.range = range  # 0 for melee, otherwise range in pixels
         self.last_used = - cooldown
-        if icon:
-            self.icon_sprite = StaticSprite(0, 0, 50, 50, filepath=icon)
-        else:
-            self.icon_sprite = None
+        self.icon = icon
+        self.loaded_icon_sprite = None
+
+    @property
+    def icon_sprite(self):
+        """The sprite of the ability's icon, loaded the first time the action bar shows it; None without an icon."""
+        if self.icon and self.loaded_icon_sprite is None:
+            self.loaded_icon_sprite = StaticSprite(0, 0, 50, 50, filepath=self.icon)
+        return self.loaded_icon_sprite
 
-    def can_use(self, current_time, player_collision, enemy, player, collidable_tiles):
+    def can_use(self, current_time, player_collision, enemy, player, occupancy_grid):
         if current_time - self.last_used >= self.cooldown:
             if enemy.mana >= self.mana_cost:
                 if self.melee:
@@ -26,7 +31,7 @@ class Ability:
                         return True
                 elif not self.melee:
                     if self.calculate_distance(enemy, player) < self.range:
-                        if not self.is_line_of_sight_blocked(enemy, player, collidable_tiles):
+                        if not self.is_line_of_sight_blocked(enemy, player, occupancy_grid):
                             return True
                 else:
                     return False
@@ -39,15 +44,9 @@ class Ability:
         """Calculate the distance between the enemy and the player."""
         return math.sqrt((player.sprite.rect.x - enemy.sprite.rect.x) ** 2 + (player.sprite.rect.y - enemy.sprite.rect.y) ** 2)
 
-    def is_line_of_sight_blocked(self, enemy, player, collidable_tiles):
-        """Check if any collidable object is blocking the line of sight to the player."""
-        line_start = enemy.sprite.rect.center
-        line_end = player.sprite.rect.center
-
-        for tile in collidable_tiles:
-            if tile.sprite.rect.clipline(line_start, line_end):
-                return True
-        return False
+    def is_line_of_sight_blocked(self, enemy, player, occupancy_grid):
+        """Check if any wall or door cell is blocking the line of sight to the player."""
+        return occupancy_grid.line_of_sight_blocked(enemy.sprite.rect.center, player.sprite.rect.center)
 
     def use(self, current_time, caster):
         """Mark the ability as used."""
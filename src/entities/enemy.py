@@ -1,22 +1,24 @@
-import time
-
-import pygame
 import random
 
 from src.entities.abilities.ability import Ability
 from src.entities.sprite import StaticSprite
+from src.utilities.game_clock import wall_clock
+from src.utilities.render_queue import RenderQueue
 
 
 class Enemy:
     WANDER, PATROL, CHASE, STAND = "WANDER", "PATROL", "CHASE", "STAND"  # Define states for the enemy
 
-    def __init__(self, x, y, width, height, filepath=None, patrol_points=None, chase_range=300, speed=80):
+    def __init__(self, x, y, width, height, filepath=None, patrol_points=None, chase_range=300, speed=80, event_scheduler=None, clock=None, rng=None):
         # Use StaticSprite as a composition
         self.sprite = StaticSprite(x, y, width, height, filepath)
+        # Time and randomness come from the simulation's clock and seeded RNG when given, so runs can be replayed
+        self.clock = clock if clock is not None else wall_clock
+        self.random = rng if rng is not None else random
         self.player_collision = False
         self.speed = speed  # Enemy speed in pixels per second
         self.state = Enemy.WANDER  # Start with wandering behavior
-        self.direction = [random.choice([-1, 1]), random.choice([-1, 1])]  # Random initial direction
+        self.direction = [self.random.choice([-1, 1]), self.random.choice([-1, 1])]  # Random initial direction
         self.chase_range = chase_range  # Distance at which enemy will start chasing player
         self.health = 50
         self.max_health = 100
@@ -27,8 +29,15 @@ class Enemy:
         self.max_stamina = 100
         self.is_casting = False
         self.cast_start_time = None
+        self.current_ability = None
+        self.cast_event = None  # Scheduled completion of the current cast
         self.last_used = 0
+        self.event_scheduler = event_scheduler  # EventScheduler firing cast completions and cooldown ends
         self.is_target_of = None
+        self.pool = None  # EnemyPool holding this enemy's batched state, if any
+        self.pool_index = None
+        self.ai_slot = 0  # Stagger slot and time of the last update given by the AIScheduler
+        self.ai_updated_time = None
 
         # Optional patrol points for patrolling behavior
         if patrol_points:
@@ -39,10 +48,13 @@ class Enemy:
             Ability("Claw Swipe", damage=10, mana_cost=5, cooldown=5, melee=True),
             Ability("Dark Bolt", damage=30, mana_cost=5, cooldown=3, cast_time=5, melee=False, range=300)
         ]
+        self.ready_abilities = list(self.abilities)  # Abilities whose cooldown is over; only these are evaluated
         self.target = None
 
     def decrease_health(self, amount):
         self.health = max(0, self.health - amount)
+        if self.pool is not None:
+            self.pool.health[self.pool_index] = self.health
 
     def decrease_mana(self, amount):
         self.mana = max(0, self.mana - amount)
@@ -50,26 +62,48 @@ class Enemy:
     def decrease_stamina(self, amount):
         self.stamina = max(0, self.stamina - amount)
 
-    def use_ability(self, player, collidable_tiles):
-        current_time = time.time()
+    def use_ability(self, player, occupancy_grid):
+        current_time = self.clock.now()
         if self.is_casting:
-            if self.current_ability.can_use(current_time, self.player_collision, self, player, collidable_tiles):
-                if self.cast_start_time + self.current_ability.cast_time <= current_time:
-                    self.current_ability.use(current_time, self)
-                    self.mana -= self.current_ability.mana_cost
-                    player.decrease_health(self.current_ability.damage)
-                    self.is_casting = False
-            else:
-                self.is_casting = False
-        else:
-            for ability in self.abilities:
-                if self.target is not None:
-                    if ability.can_use(current_time, self.player_collision, self, player, collidable_tiles):
-                        self.cast_start_time = current_time
-                        self.is_casting = True
-                        self.current_ability = ability
-
-    def update(self, delta_time, collidable_tiles, enemies, player):
+            # The cast completes in finish_cast; it is interrupted if the player gets out of reach
+            if not self.current_ability.can_use(current_time, self.player_collision, self, player, occupancy_grid):
+                self.cancel_cast()
+        elif self.target is not None and self.ready_abilities:
+            chosen = None
+            for ability in self.ready_abilities:
+                if ability.can_use(current_time, self.player_collision, self, player, occupancy_grid):
+                    chosen = ability
+            if chosen is not None:
+                self.cast_start_time = current_time
+                self.current_ability = chosen
+                self.set_casting(True)
+                self.cast_event = self.event_scheduler.schedule(current_time + chosen.cast_time, self.finish_cast, player, occupancy_grid)
+
+    def finish_cast(self, player, occupancy_grid):
+        """Called by the event scheduler when the cast time is over: hit the player if still in reach."""
+        current_time = self.clock.now()
+        ability = self.current_ability
+        self.cast_event = None
+        if ability.can_use(current_time, self.player_collision, self, player, occupancy_grid):
+            ability.use(current_time, self)
+            self.mana -= ability.mana_cost
+            player.decrease_health(ability.damage)
+            # The ability is evaluated again once its cooldown is over
+            self.ready_abilities.remove(ability)
+            self.event_scheduler.schedule(current_time + ability.cooldown, self.ready_abilities.append, ability)
+        self.set_casting(False)
+
+    def cancel_cast(self):
+        self.event_scheduler.cancel(self.cast_event)
+        self.cast_event = None
+        self.set_casting(False)
+
+    def set_casting(self, casting):
+        self.is_casting = casting
+        if self.pool is not None:
+            self.pool.casting[self.pool_index] = casting
+
+    def update(self, delta_time, occupancy_grid, spatial_hash, player, flow_field=None):
         # Determine the current state based on player proximity
         distance_to_player = ((player.sprite.rect.x - self.sprite.rect.x) ** 2 + (player.sprite.rect.y - self.sprite.rect.y) ** 2) ** 0.5
         if distance_to_player <= self.chase_range:
@@ -79,21 +113,21 @@ class Enemy:
 
         # Update based on the current state
         if self.state == Enemy.WANDER:
-            self.wander(delta_time, collidable_tiles, enemies)
+            self.wander(delta_time, occupancy_grid, spatial_hash)
             self.target = None
         elif self.state == Enemy.PATROL:
-            self.patrol(delta_time, collidable_tiles, enemies)
+            self.patrol(delta_time, occupancy_grid, spatial_hash)
             self.target = None
         elif self.state == Enemy.CHASE:
-            self.chase(delta_time, collidable_tiles, enemies, player)
+            self.chase(delta_time, occupancy_grid, spatial_hash, player, flow_field)
             self.target = player
-        self.use_ability(player, collidable_tiles)
+        self.use_ability(player, occupancy_grid)
 
-    def draw_casting_bar(self, screen, offset_x, offset_y):
+    def draw_casting_bar(self, render_queue, offset_x, offset_y):
         """Draw the casting progress bar below the enemy."""
         if self.is_casting:
             # Calculate casting progress
-            current_time = time.time()
+            current_time = self.clock.now()
             elapsed_time = current_time - self.cast_start_time
             cast_progress = min(1.0, elapsed_time / self.current_ability.cast_time)
 
@@ -104,24 +138,24 @@ class Enemy:
             bar_y = self.sprite.rect.y + self.sprite.rect.height + offset_y + 5  # Position below the enemy
 
             # Draw background bar (in gray)
-            pygame.draw.rect(screen, (100, 100, 100), (bar_x, bar_y, bar_width, bar_height))
+            render_queue.submit_rect((100, 100, 100), (bar_x, bar_y, bar_width, bar_height), RenderQueue.OVERLAYS)
 
             # Draw progress bar (in green)
             progress_width = bar_width * cast_progress
-            pygame.draw.rect(screen, (0, 255, 0), (bar_x, bar_y, progress_width, bar_height))
+            render_queue.submit_rect((0, 255, 0), (bar_x, bar_y, progress_width, bar_height), RenderQueue.OVERLAYS)
 
-    def wander(self, delta_time, collidable_tiles, enemies):
+    def wander(self, delta_time, occupancy_grid, spatial_hash):
         # Set the wander speed
         wander_speed = self.speed / 2
 
         # Randomly change direction occasionally for wandering
-        if random.random() < 0.01:  # 1% chance to change direction each frame
-            self.direction = [random.choice([-1, 1]), random.choice([-1, 1])]
+        if self.random.random() < 0.01:  # 1% chance to change direction each frame
+            self.direction = [self.random.choice([-1, 1]), self.random.choice([-1, 1])]
 
         # Move at half speed for wandering
-        self.move(delta_time, collidable_tiles, enemies, None, wander_speed)
+        self.move(delta_time, occupancy_grid, spatial_hash, None, wander_speed)
 
-    def patrol(self, delta_time, collidable_tiles, enemies):
+    def patrol(self, delta_time, occupancy_grid, spatial_hash):
         # Move towards the current patrol point
         target_x, target_y = self.patrol_points[self.patrol_index]
         direction_vector = [target_x - self.sprite.rect.x, target_y - self.sprite.rect.y]
@@ -132,14 +166,22 @@ class Enemy:
             self.direction = [direction_vector[0] / distance, direction_vector[1] / distance]
 
         # Move towards the target patrol point
-        self.move(delta_time, collidable_tiles, enemies, None, self.speed)
+        self.move(delta_time, occupancy_grid, spatial_hash, None, self.speed)
 
         # Check if we reached the patrol point
         if abs(target_x - self.sprite.rect.x) < 5 and abs(target_y - self.sprite.rect.y) < 5:
             # Move to the next patrol point
             self.patrol_index = (self.patrol_index + 1) % len(self.patrol_points)
 
-    def chase(self, delta_time, collidable_tiles, enemies, player):
+    def chase(self, delta_time, occupancy_grid, spatial_hash, player, flow_field=None):
+        # Follow the flow field around walls until the next step is the player's own cell
+        if flow_field is not None:
+            next_cell = flow_field.next_cell(*occupancy_grid.cell_at(*self.sprite.rect.center))
+            if next_cell is not None and next_cell != flow_field.player_cell and self.speed > 0:
+                self.steer_to_cell(next_cell, occupancy_grid, self.speed * delta_time)
+                self.move(delta_time, occupancy_grid, spatial_hash, player, self.speed)
+                return
+
         # Calculate direction towards the player
         direction_vector = [player.sprite.rect.x - self.sprite.rect.x, player.sprite.rect.y - self.sprite.rect.y]
 
@@ -149,9 +191,23 @@ class Enemy:
             self.direction = [direction_vector[0] / distance, direction_vector[1] / distance]
 
         # Move towards the player at full speed
-        self.move(delta_time, collidable_tiles, enemies, player, self.speed)
-
-    def move(self, delta_time, collidable_tiles, enemies, player, speed):
+        self.move(delta_time, occupancy_grid, spatial_hash, player, self.speed)
+
+    def steer_to_cell(self, cell, occupancy_grid, step):
+        """
+        Point the direction at a cell so the enemy ends up exactly aligned with it.
+        Each axis moves at most the remaining distance, so the enemy lines up with corridors instead of grazing their walls.
+        :param step: Distance the enemy moves this tick, in pixels.
+        """
+        target_x = cell[0] * occupancy_grid.tile_width + (occupancy_grid.tile_width - self.sprite.rect.width) // 2
+        target_y = cell[1] * occupancy_grid.tile_height + (occupancy_grid.tile_height - self.sprite.rect.height) // 2
+        direction = [max(-1.0, min(1.0, (target_x - self.sprite.rect.x) / step)), max(-1.0, min(1.0, (target_y - self.sprite.rect.y) / step))]
+        length = (direction[0] ** 2 + direction[1] ** 2) ** 0.5
+        if length > 1:
+            direction = [direction[0] / length, direction[1] / length]
+        self.direction = direction
+
+    def move(self, delta_time, occupancy_grid, spatial_hash, player, speed):
         if not self.is_casting:
             # Calculate potential movement
             dx = self.direction[0] * speed * delta_time
@@ -163,7 +219,7 @@ class Enemy:
                 new_rect.x += dx
 
                 # Check for collisions with collidable tiles, enemies, or the player
-                if self.collides(new_rect, collidable_tiles, enemies, player):
+                if self.collides(new_rect, occupancy_grid, spatial_hash, player):
                     self.direction[0] *= -1  # Reverse direction upon collision
                 else:
                     # No collision, update x position
@@ -175,13 +231,13 @@ class Enemy:
                 new_rect.y += dy
 
                 # Check for collisions with collidable tiles, enemies, or the player
-                if self.collides(new_rect, collidable_tiles, enemies, player):
+                if self.collides(new_rect, occupancy_grid, spatial_hash, player):
                     self.direction[1] *= -1  # Reverse direction upon collision
                 else:
                     # No collision, update y position
                     self.sprite.rect.y = new_rect.y
 
-    def collides(self, new_rect, collidable_tiles, enemies, player):
+    def collides(self, new_rect, occupancy_grid, spatial_hash, player):
         if player and new_rect.colliderect(player.sprite.rect):
             self.player_collision = True
             player.enemy_collisions.append(self)
@@ -191,27 +247,34 @@ class Enemy:
             if player is not None:
                 if self in player.enemy_collisions:
                     player.enemy_collisions.remove(self)
-        for tile in collidable_tiles:
-            if new_rect.colliderect(tile.sprite.rect):
-                return True
-        for other_enemy in enemies:
-            if other_enemy is not self and new_rect.colliderect(other_enemy.sprite.rect):
+        if occupancy_grid.collides(new_rect):
+            return True
+        for other in spatial_hash.query_rect(new_rect, exclude=self):
+            if isinstance(other, Enemy):
                 return True
         return False
 
-    def draw(self, screen, player_rect):
-        """Draw the enemy with an offset based on the player's position."""
+    def draw(self, render_queue, screen_size, player_rect, position=None):
+        """
+        Queue the enemy for drawing with an offset based on the player's position.
+        :param screen_size: Size of the screen the queue is flushed to.
+        :param position: World position to draw at instead of the current rect (used for interpolation).
+        """
         # Calculate the enemy's position with the offset applied for rendering
-        offset_x = screen.get_width() // 2 - player_rect.centerx
-        offset_y = screen.get_height() // 2 - player_rect.centery
+        offset_x = screen_size[0] // 2 - player_rect.centerx
+        offset_y = screen_size[1] // 2 - player_rect.centery
+        if position is not None:
+            # Shift the offset so everything relative to the rect lands at the requested position
+            offset_x += position[0] - self.sprite.rect.x
+            offset_y += position[1] - self.sprite.rect.y
 
         # Adjust the enemy's position based on the calculated offset
         screen_pos = (self.sprite.rect.x + offset_x, self.sprite.rect.y + offset_y)
-        screen.blit(self.sprite.image, screen_pos)
+        render_queue.submit(self.sprite.image, screen_pos, RenderQueue.ENTITIES)
 
         # Draw the casting bar if the enemy is casting
-        self.draw_casting_bar(screen, offset_x, offset_y)
+        self.draw_casting_bar(render_queue, offset_x, offset_y)
 
         # If this enemy is selected, draw a highlight
         if self.is_target_of is not None:
-            pygame.draw.rect(screen, (255, 0, 0), self.sprite.rect.move(offset_x, offset_y), 2)
+            render_queue.submit_rect((255, 0, 0), self.sprite.rect.move(offset_x, offset_y), RenderQueue.OVERLAYS, 2)
@@ -1,4 +1,5 @@
 from src.entities.sprite import StaticSprite
+from src.utilities.log import log
 
 
 class Item:
@@ -20,16 +21,16 @@ class Item:
         """Create a sprite for this item using the provided src if it doesn't already exist."""
         if self.src and self.sprite is None:
             self.sprite = StaticSprite(x, y, width, height, self.src)
-            print(f"Sprite created for item '{self.name}' using image '{self.src}'")
+            log.info(f"Sprite created for item '{self.name}' using image '{self.src}'")
         elif self.sprite:
-            print(f"Sprite already exists for item '{self.name}'.")
+            log.info(f"Sprite already exists for item '{self.name}'.")
 
     def update_sprite(self, new_src, x=0, y=0, width=50, height=50):
         """Update the sprite image for the item."""
         self.src = new_src
         if self.sprite is not None:
             self.sprite.load_image(new_src)
-            print(f"Sprite updated for item '{self.name}' with new image '{new_src}'")
+            log.info(f"Sprite updated for item '{self.name}' with new image '{new_src}'")
         else:
             self.create_sprite(x, y, width, height)
 
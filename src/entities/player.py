@@ -1,18 +1,26 @@
-import time
 import pygame
 
 from src.entities.abilities.ability import Ability
+from src.entities.enemy import Enemy
 from src.entities.equipped import Equipped
 from src.entities.sprite import StaticSprite
 from src.entities.status_bars import StatusBars
 from src.entities.inventory import Inventory
+from src.utilities.game_clock import wall_clock
+from src.utilities.profiler import profiler
+from src.utilities.render_queue import RenderQueue
+from src.utilities.text_renderer import text_renderer
 
 
 class Player:
-    def __init__(self, x, y, width, height, filepath=None, item_catalog=None):
+    def __init__(self, x, y, width, height, filepath=None, item_catalog=None, screen_size=None, event_scheduler=None, clock=None):
         # Use StaticSprite as a composition
         self.sprite = StaticSprite(x, y, width, height, filepath)
-        self.screen_width, self.screen_height = pygame.display.get_surface().get_size()
+        self.clock = clock if clock is not None else wall_clock  # Simulation clock, so runs can be replayed
+        # Without an explicit size (e.g. when running headless), use the size of the open window
+        if screen_size is None:
+            screen_size = pygame.display.get_surface().get_size()
+        self.screen_width, self.screen_height = screen_size
         self.speed = 150  # Player speed in pixels per second
         self.movement = [0, 0]
         self.health = 50
@@ -28,11 +36,12 @@ class Player:
         self.cast_start_time = None
         self.is_casting = False
         self.current_ability = None
+        self.event_scheduler = event_scheduler  # EventScheduler firing cast completions
         self.portrait_image_path = "spellswordportrait.png"
         self.item_catalog = item_catalog
 
-        # Font for displaying damage taken
-        self.font = pygame.font.Font(None, 24)  # You can adjust the size as needed
+        # Font size for displaying damage taken
+        self.font_size = 24  # You can adjust the size as needed
         self.damage_display_time = 1.0  # Display damage for 1 second
         self.target = None  # Add this line to track the selected enemy
         self.abilities = [
@@ -41,88 +50,75 @@ class Player:
         self.enemy_collisions = []
         self.enemy_collision = False
 
-        # Initialize status bars with a reference to the player object itself
-        self.status_bars = StatusBars(self)
-        self.inventory = Inventory("player.json")
+        # The HUD and the inventory are only needed once drawn or opened, which headless runs never do
+        self.loaded_status_bars = None
+        self.loaded_inventory = None
         self.equipped = Equipped("player.json")
         self.equipped_sprites = []
         self.update_equipped_sprites()
 
-    def use_ability(self, ability_index, collidable_tiles):
-        for enemy in self.enemy_collisions:
-            if enemy == self.target:
-                self.enemy_collision = True
-            else:
-                self.enemy_collision = False
-        if 0 <= ability_index < len(self.abilities):
-            current_time = time.time()
-
-            # Debugging: Starting Ability Usage
-            print(f"\nAttempting to use ability at index: {ability_index}")
-            print(f"Current time: {current_time}")
-            print(f"Player mana: {self.mana}, Target: {self.target}")
-            print(f"Is casting: {self.is_casting}")
-
-            if not self.is_casting:
-                # Debugging: Looking for abilities to use
-                print(f"Not currently casting. Looking for abilities to use...")
-                for ability in self.abilities:
-                    if self.target is not None:
-                        # Debugging: Checking if ability can be used
-                        print(f"Checking ability: {ability.name}")
-                        if ability.can_use(current_time, self.enemy_collision, self, self.target, collidable_tiles):
-                            # Start casting the ability
-                            print(f"Starting to cast ability: {ability.name}")
-                            self.cast_start_time = current_time
-                            self.is_casting = True
-                            self.current_ability = ability
-                            break
-                        else:
-                            # Debugging: Ability cannot be used
-                            print(f"Ability {ability.name} cannot be used. Cooldown or insufficient mana.")
-
-    def update_casting(self, collidable_tiles):
-        for enemy in self.enemy_collisions:
-            if enemy == self.target:
-                self.enemy_collision = True
-            else:
-                self.enemy_collision = False
-        current_time = time.time()
-        if self.is_casting:
-            if self.current_ability and (self.cast_start_time + self.current_ability.cast_time <= current_time):
-                # Cast ability
-                self.current_ability.use(current_time, self)
-                self.mana -= self.current_ability.mana_cost
-                if self.target:
-                    self.target.decrease_health(self.current_ability.damage)
-                self.is_casting = False
-                self.current_ability = None
-
-    def select_target(self, mouse_pos, enemies):
+    @property
+    def status_bars(self):
+        if self.loaded_status_bars is None:
+            # Status bars hold a reference to the player object itself
+            self.loaded_status_bars = StatusBars(self)
+        return self.loaded_status_bars
+
+    @property
+    def inventory(self):
+        if self.loaded_inventory is None:
+            self.loaded_inventory = Inventory("player.json")
+        return self.loaded_inventory
+
+    def use_ability(self, ability_index, occupancy_grid):
+        # Melee abilities need the target to be touching the player
+        self.enemy_collision = self.target is not None and self.target in self.enemy_collisions
+        if 0 <= ability_index < len(self.abilities) and not self.is_casting and self.target is not None:
+            current_time = self.clock.now()
+            for ability in self.abilities:
+                if ability.can_use(current_time, self.enemy_collision, self, self.target, occupancy_grid):
+                    # Start casting the ability; finish_cast is called when the cast time is over
+                    self.cast_start_time = current_time
+                    self.is_casting = True
+                    self.current_ability = ability
+                    self.event_scheduler.schedule(current_time + ability.cast_time, self.finish_cast)
+                    break
+
+    def finish_cast(self):
+        """Called by the event scheduler when the cast time is over: use the ability on the target."""
+        current_time = self.clock.now()
+        self.current_ability.use(current_time, self)
+        self.mana -= self.current_ability.mana_cost
+        if self.target:
+            self.target.decrease_health(self.current_ability.damage)
+        self.is_casting = False
+        self.current_ability = None
+
+    def select_target(self, mouse_pos, spatial_hash):
         # Calculate the offset for the viewport, centered on the player
-        screen_width, screen_height = pygame.display.get_surface().get_size()
-        offset_x = self.sprite.rect.centerx - screen_width // 2
-        offset_y = self.sprite.rect.centery - screen_height // 2
+        offset_x = self.sprite.rect.centerx - self.screen_width // 2
+        offset_y = self.sprite.rect.centery - self.screen_height // 2
 
         # Adjust the mouse position to match the world coordinates
         adjusted_mouse_pos = (mouse_pos[0] + offset_x, mouse_pos[1] + offset_y)
 
         # Check if the adjusted mouse click is within the bounding box of an enemy
-        for enemy in enemies:
-            if enemy.sprite.rect.collidepoint(adjusted_mouse_pos):
-                self.target = enemy  # Set this enemy as the target
-                enemy.is_target_of = self
+        previous_target = self.target
+        self.target = None
+        for obj in spatial_hash.query_point(adjusted_mouse_pos):
+            if isinstance(obj, Enemy):
+                self.target = obj  # Set this enemy as the target
+                obj.is_target_of = self
                 break
-            else:
-                self.target = None
-        for enemy in enemies:
-            if self.target != enemy:
-                enemy.is_target_of = None
+
+        # Only the previous target can still be highlighted
+        if previous_target is not None and previous_target is not self.target:
+            previous_target.is_target_of = None
 
     def decrease_health(self, amount):
         self.health = max(0, self.health - amount)
         # Record the damage along with the timestamp
-        self.damage_taken.append((amount, time.time()))
+        self.damage_taken.append((amount, self.clock.now()))
 
     def decrease_mana(self, amount):
         self.mana = max(0, self.mana - amount)
@@ -144,13 +140,11 @@ class Player:
         if keys[pygame.K_s]:
             self.movement[1] = 1
 
-    def update(self, delta_time, collidable_tiles, enemies, doors):
-        keys = pygame.key.get_pressed()  # Get the current state of all keys
-        self.handle_input(keys)  # Handle movement input
-        self.update_casting(collidable_tiles)
-
-        self.handle_axis_movement(delta_time, 0, collidable_tiles + enemies)  # x-axis
-        self.handle_axis_movement(delta_time, 1, collidable_tiles + enemies)  # y-axis
+    def update(self, delta_time, occupancy_grid, spatial_hash):
+        # Movement input is set beforehand through handle_input; casts complete through the event scheduler
+        with profiler.scope("player.movement"):
+            self.handle_axis_movement(delta_time, 0, occupancy_grid, spatial_hash)  # x-axis
+            self.handle_axis_movement(delta_time, 1, occupancy_grid, spatial_hash)  # y-axis
 
         self.update_equipped_item_sprites()
 
@@ -159,7 +153,7 @@ class Player:
         for sprite in self.equipped_sprites:
             sprite.rect.topleft = self.sprite.rect.topleft
 
-    def handle_axis_movement(self, delta_time, axis, collidable_objects):
+    def handle_axis_movement(self, delta_time, axis, occupancy_grid, spatial_hash):
         direction = self.movement[axis]
         if direction != 0:
             movement_speed = direction * self.speed * delta_time
@@ -169,19 +163,21 @@ class Player:
             elif axis == 1:  # y-axis movement
                 new_rect.y += movement_speed
 
-            # Collision handling for both axes
-            for obj in collidable_objects:
-                if new_rect.colliderect(obj.sprite.rect):
+            # Collision handling for both axes, against the wall and door cells and nearby enemies
+            collidable_rects = occupancy_grid.solid_rects(new_rect)
+            collidable_rects += [obj.sprite.rect for obj in spatial_hash.query_rect(new_rect, exclude=self) if isinstance(obj, Enemy)]
+            for rect in collidable_rects:
+                if new_rect.colliderect(rect):
                     if axis == 0:  # x-axis collision
                         if movement_speed > 0:  # Moving right
-                            new_rect.right = obj.sprite.rect.left
+                            new_rect.right = rect.left
                         elif movement_speed < 0:  # Moving left
-                            new_rect.left = obj.sprite.rect.right
+                            new_rect.left = rect.right
                     elif axis == 1:  # y-axis collision
                         if movement_speed > 0:  # Moving down
-                            new_rect.bottom = obj.sprite.rect.top
+                            new_rect.bottom = rect.top
                         elif movement_speed < 0:  # Moving up
-                            new_rect.top = obj.sprite.rect.bottom
+                            new_rect.top = rect.bottom
 
             # Update position based on collision detection
             if axis == 0:
@@ -189,38 +185,40 @@ class Player:
             elif axis == 1:
                 self.sprite.rect.y = new_rect.y
 
-    def draw(self, screen):
-        """Draw the player sprite centered on the screen."""
-        center_width = screen.get_width() // 2 - self.sprite.rect.width // 2
-        center_height = screen.get_height() // 2 - self.sprite.rect.height // 2
+    def draw(self, render_queue, screen_size):
+        """
+        Queue the player sprite centered on the screen, and the HUD.
+        :param screen_size: Size of the screen the queue is flushed to.
+        """
+        center_width = screen_size[0] // 2 - self.sprite.rect.width // 2
+        center_height = screen_size[1] // 2 - self.sprite.rect.height // 2
         if self.sprite.image:
-            screen.blit(self.sprite.image, (center_width, center_height))
+            render_queue.submit(self.sprite.image, (center_width, center_height), RenderQueue.PLAYER)
         else:
-            pygame.draw.rect(screen, (255, 0, 0), (center_width, center_height, self.sprite.rect.width, self.sprite.rect.height))
-        # Draw the status bars
-        self.status_bars.draw(screen)
-        self.draw_equipped_items(screen, center_width, center_height)
+            render_queue.submit_rect((255, 0, 0), (center_width, center_height, self.sprite.rect.width, self.sprite.rect.height), RenderQueue.PLAYER)
+        self.draw_equipped_items(render_queue, center_width, center_height)
 
         # Draw the damage taken above the player's head
-        current_time = time.time()
-        for damage, timestamp in self.damage_taken[:]:
-            # Only show the damage for a limited time
-            if current_time - timestamp < self.damage_display_time:
-                damage_text = self.font.render(f"-{damage}", True, (255, 0, 0))
-                text_x = center_width - damage_text.get_width() // 2
-                text_y = center_height - 20  # Positioning above the player's head
-                screen.blit(damage_text, (text_x, text_y))
-            else:
-                # Remove old damage entries
-                self.damage_taken.remove((damage, timestamp))
-
-        self.status_bars.draw(screen)
-
-    def draw_equipped_items(self, screen, center_width, center_height):
-        """Draw the equipped items on top of the player's base sprite."""
+        with profiler.scope("player.damage_text"):
+            current_time = self.clock.now()
+            for damage, timestamp in self.damage_taken[:]:
+                # Only show the damage for a limited time
+                if current_time - timestamp < self.damage_display_time:
+                    damage_text = text_renderer.render(f"-{damage}", self.font_size, (255, 0, 0))
+                    text_x = center_width - damage_text.get_width() // 2
+                    text_y = center_height - 20  # Positioning above the player's head
+                    render_queue.submit(damage_text, (text_x, text_y), RenderQueue.PLAYER)
+                else:
+                    # Remove old damage entries
+                    self.damage_taken.remove((damage, timestamp))
+
+        self.status_bars.draw(render_queue)
+
+    def draw_equipped_items(self, render_queue, center_width, center_height):
+        """Draw the equipped items on top of the player's base sprite, in the order they were queued."""
         for sprite in self.equipped_sprites:
             if sprite.image:
-                screen.blit(sprite.image, (center_width, center_height))
+                render_queue.submit(sprite.image, (center_width, center_height), RenderQueue.PLAYER)
 
     def update_equipped_sprites(self):
         """Update equipped item sprites when items are equipped or changed."""
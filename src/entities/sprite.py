@@ -1,6 +1,5 @@
 import pygame
 import os
-import random
 
 from src.utilities.file_manager import FileManager
 
@@ -66,35 +65,3 @@ class AnimatedSprite(BaseSprite):
             if self.frame_count >= speed:
                 self.frame_count = 0
                 self.animation_index = (self.animation_index + 1) % len(self.animation_images)
-
-
-# Tile Sprite Class
-class TileSprite(BaseSprite):
-    def __init__(self, x, y, width, height, image_path=None, rows=1, cols=1):
-        super().__init__(x, y, width, height)
-        self.tiles = []
-        self.current_tile_index = 0
-        if image_path:
-            self.load_image(image_path)
-            self.prepare_tiles(rows, cols)
-            self.select_random_tile()
-
-    def prepare_tiles(self, rows, cols):
-        """Cut the loaded image into tiles and store them."""
-        if self.image:
-            tile_width = self.image.get_width() // cols
-            tile_height = self.image.get_height() // rows
-            for i in range(rows):
-                for j in range(cols):
-                    tile_rect = pygame.Rect(j * tile_width, i * tile_height, tile_width, tile_height)
-                    self.tiles.append(self.image.subsurface(tile_rect))
-
-    def draw(self, screen):
-        if self.tiles:
-            screen.blit(self.tiles[self.current_tile_index], self.rect)
-        else:
-            pygame.draw.rect(screen, (255, 0, 0), self.rect)
-
-    def select_random_tile(self):
-        if self.tiles:
-            self.current_tile_index = random.randint(0, len(self.tiles) - 1)
@@ -1,9 +1,13 @@
 # status_bars.py
 
-import time
+import weakref
+
 import pygame
 
 from src.utilities.file_manager import FileManager
+from src.utilities.profiler import profiler
+from src.utilities.render_queue import RenderQueue
+from src.utilities.text_renderer import text_renderer
 
 
 class StatusBars:
@@ -16,6 +20,18 @@ class StatusBars:
         self.portrait_image = None
         self.portrait_image = map_data = FileManager.load_image(player.portrait_image_path)
 
+        # The HUD is composed on a transparent surface; each widget is redrawn only when the value it shows changes.
+        # Its pixels are kept premultiplied by alpha so that translucent images stacked on it blend like they would on the screen.
+        self.hud_surface = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+        self.widget_keys = {}  # Widget name -> value it was last drawn with
+        # Image -> premultiplied copy, dropped with the image once its cache and the abilities let go of it
+        self.premultiplied_images = weakref.WeakKeyDictionary()
+
+        # Shared overlay darkening the icons of abilities on cooldown
+        self.cooldown_overlay = pygame.Surface((50, 50), pygame.SRCALPHA)
+        self.cooldown_overlay.fill((0, 0, 0, 150))  # Semi-transparent overlay
+        self.layout()
+
     def draw_bar(self, screen, current_value, max_value, color, shadow_color, x, y, width, height):
         # Ensure the current value does not exceed the maximum
         current_value = max(0, min(current_value, max_value))
@@ -33,16 +49,13 @@ class StatusBars:
 
     def draw_casting_bar(self, screen):
         if self.player.is_casting and self.player.current_ability:
-            current_time = time.time()
+            current_time = self.player.clock.now()
             elapsed_time = current_time - self.player.cast_start_time
             cast_duration = self.player.current_ability.cast_time
 
             if elapsed_time < cast_duration:
                 # Draw casting bar
-                cast_x = 20
-                cast_y = self.screen_height - 140  # Positioned above the action bar
-                cast_width = self.screen_width - 40
-                cast_height = 20
+                cast_x, cast_y, cast_width, cast_height = self.casting_bar_rect
                 fill_width = (elapsed_time / cast_duration) * cast_width
 
                 # Draw background
@@ -52,75 +65,148 @@ class StatusBars:
                 pygame.draw.rect(screen, (0, 255, 0), (cast_x, cast_y, fill_width, cast_height))
 
                 # Draw text for ability name
-                font = pygame.font.Font(None, 24)
-                text = font.render(f"Casting: {self.player.current_ability.name}", True, (255, 255, 255))
-                screen.blit(text, (cast_x + 5, cast_y - 25))
+                # The text renderer keeps the premultiplied label itself, within its memory budget
+                text = text_renderer.render(f"Casting: {self.player.current_ability.name}", 24, (255, 255, 255), premultiplied=True)
+                screen.blit(text, (cast_x + 5, cast_y - 25), special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    def casting_bar_key(self):
+        """Return what the casting bar currently shows: the ability name and the filled width in pixels."""
+        if self.player.is_casting and self.player.current_ability:
+            elapsed_time = self.player.clock.now() - self.player.cast_start_time
+            cast_duration = self.player.current_ability.cast_time
+            if elapsed_time < cast_duration:
+                return self.player.current_ability.name, int((elapsed_time / cast_duration) * self.casting_bar_rect[2])
+        return None
+
+    def draw(self, render_queue):
+        with profiler.scope("status_bars.draw"):
+            self.update_hud()
+            # Only copy the parts of the HUD surface that currently hold widgets
+            regions = [self.xp_rect, self.status_rect, self.action_bar_rect.clip(self.action_bar_x, self.action_bar_y, (self.icon_size + self.icon_padding) * len(self.player.abilities), self.icon_size)]
+            if self.widget_keys["casting_bar"] is not None:
+                regions.append(self.casting_widget_rect)
+            for region in regions:
+                render_queue.submit(self.hud_surface, region.topleft, RenderQueue.HUD, region, pygame.BLEND_PREMULTIPLIED)
+
+    def blit_premultiplied(self, surface, image, position):
+        """Blend an image onto the premultiplied HUD surface."""
+        premultiplied = self.premultiplied_images.get(image)
+        if premultiplied is None:
+            premultiplied = image.convert_alpha().premul_alpha() if pygame.display.get_surface() else image.premul_alpha()
+            self.premultiplied_images[image] = premultiplied
+        surface.blit(premultiplied, position, special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    def widget_keys_now(self):
+        """Return, per widget, a hashable value that fully determines its pixels."""
+        player = self.player
+        # The action bar only changes when an icon changes or an ability enters or leaves its cooldown
+        current_time = self.player.clock.now()
+        action_bar_key = tuple(
+            (id(ability.icon_sprite.image) if ability.icon_sprite else None, ability.cooldown - (current_time - ability.last_used) > 0)
+            for ability in player.abilities
+        )
+        return {
+            "xp": (player.xp, player.max_xp),
+            "portrait": id(self.portrait_image),
+            "health": (player.health, player.max_health),
+            "mana": (player.mana, player.max_mana),
+            "stamina": (player.stamina, player.max_stamina),
+            "action_bar": action_bar_key,
+            "casting_bar": self.casting_bar_key(),
+        }
+
+    def update_hud(self):
+        """Redraw the widgets whose values changed since the last frame on the HUD surface."""
+        keys = self.widget_keys_now()
+        dirty_rects = [rect for name, rect, _ in self.widgets if name not in self.widget_keys or self.widget_keys[name] != keys[name]]
+        self.widget_keys = keys
+        for dirty_rect in dirty_rects:
+            # Widgets overlap (the portrait is under the bars), so every widget touching the area is redrawn in order
+            self.hud_surface.set_clip(dirty_rect)
+            self.hud_surface.fill((0, 0, 0, 0))
+            for _, rect, draw_function in self.widgets:
+                if rect.colliderect(dirty_rect):
+                    draw_function(self.hud_surface)
+        self.hud_surface.set_clip(None)
+
+    def draw_xp_bar(self, screen):
+        self.draw_bar(screen, self.player.xp, self.player.max_xp, (128, 0, 128), (80, 0, 80), *self.xp_rect)  # Purple color for the XP bar
+
+    def draw_health_bar(self, screen):
+        self.draw_bar(screen, self.player.health, self.player.max_health, (255, 0, 0), (128, 0, 0), *self.health_rect)
+
+    def draw_mana_bar(self, screen):
+        self.draw_bar(screen, self.player.mana, self.player.max_mana, (0, 100, 255), (0, 50, 128), *self.mana_rect)
+
+    def draw_stamina_bar(self, screen):
+        self.draw_bar(screen, self.player.stamina, self.player.max_stamina, (255, 255, 0), (128, 128, 0), *self.stamina_rect)
+
+    def draw_portrait(self, screen):
+        # Draw the portrait image next to the status bars
+        if self.portrait_image:
+            self.blit_premultiplied(screen, self.portrait_image, self.portrait_rect.topleft)
+
+    def draw_action_bar(self, screen):
+        # Draw each ability icon from its StaticSprite
+        for i, ability in enumerate(self.player.abilities):
+            icon_position = (self.action_bar_x + (self.icon_size + self.icon_padding) * i, self.action_bar_y)
+            if ability.icon_sprite:
+                ability.icon_sprite.rect.topleft = icon_position
+                if ability.icon_sprite.image:
+                    self.blit_premultiplied(screen, ability.icon_sprite.image, icon_position)
+                else:
+                    pygame.draw.rect(screen, (255, 0, 0), ability.icon_sprite.rect)
 
-    def draw(self, screen):
-        # Draw the XP bar at the top of the screen with padding
+            # Draw cooldown overlay if the ability is on cooldown
+            current_time = self.player.clock.now()
+            cooldown_remaining = ability.cooldown - (current_time - ability.last_used)
+            if cooldown_remaining > 0:
+                self.blit_premultiplied(screen, self.cooldown_overlay, icon_position)
+
+    def layout(self):
+        """Compute where every widget sits on the HUD surface."""
+        # The XP bar at the top of the screen with padding
         xp_padding = 20
         xp_height = 25
-        xp_y_position = xp_padding
-
-        self.draw_bar(
-            screen,
-            self.player.xp, self.player.max_xp,
-            (128, 0, 128), (80, 0, 80),  # Purple color for the XP bar
-            xp_padding, xp_y_position,
-            self.screen_width - (2 * xp_padding), xp_height
-        )
+        self.xp_rect = pygame.Rect(xp_padding, xp_padding, self.screen_width - (2 * xp_padding), xp_height)
 
-        # Draw the portrait image next to the status bars
+        # The portrait image next to the status bars
         portrait_size = 64
-        portrait_x = xp_padding
-        portrait_y = xp_y_position + xp_height + 10
+        self.portrait_rect = pygame.Rect(xp_padding, self.xp_rect.bottom + 10, portrait_size, portrait_size)
         if self.portrait_image:
-            screen.blit(self.portrait_image, (portrait_x, portrait_y))
+            self.portrait_rect.size = self.portrait_image.get_size()
 
         # Ensure that bars do not overlap and align properly
         bar_width = 187
         bar_height = 20
         gap_between_bars = 10
 
-        # Set the x position for the status bars to align with the right side of the portrait
-        bar_x = portrait_x + portrait_size + 10
-
-        # Calculate the y position such that the bars are properly spaced from each other
-        y_position = portrait_y
-
-        # Draw health bar
-        self.draw_bar(screen, self.player.health, self.player.max_health, (255, 0, 0), (128, 0, 0), bar_x, y_position, bar_width, bar_height)
-
-        # Draw mana bar
-        y_position += bar_height + gap_between_bars
-        self.draw_bar(screen, self.player.mana, self.player.max_mana, (0, 100, 255), (0, 50, 128), bar_x, y_position, bar_width, bar_height)
-
-        # Draw stamina bar
-        y_position += bar_height + gap_between_bars
-        self.draw_bar(screen, self.player.stamina, self.player.max_stamina, (255, 255, 0), (128, 128, 0), bar_x, y_position, bar_width, bar_height)
-
-        # Draw the action bar on the screen showing available abilities
-        action_bar_x = 20
-        action_bar_y = self.screen_height - 70
-        icon_size = 50
-        padding = 10
-
-        # Draw each ability icon using the StaticSprite class
-        for i, ability in enumerate(self.player.abilities):
-            if ability.icon_sprite:
-                ability.icon_sprite.rect.topleft = (action_bar_x + (icon_size + padding) * i, action_bar_y)
-                ability.icon_sprite.draw(screen)
-
-            # Draw cooldown overlay if the ability is on cooldown
-            current_time = time.time()
-            cooldown_remaining = ability.cooldown - (current_time - ability.last_used)
-            if cooldown_remaining > 0:
-                cooldown_overlay = pygame.Surface((icon_size, icon_size), pygame.SRCALPHA)
-                cooldown_overlay.fill((0, 0, 0, 150))  # Semi-transparent overlay
-                screen.blit(
-                    cooldown_overlay,
-                    (action_bar_x + (icon_size + padding) * i, action_bar_y)
-                )
-
-        # Draw the casting bar
-        self.draw_casting_bar(screen)
+        # Align the status bars with the right side of the portrait, spaced from each other
+        bar_x = self.portrait_rect.x + portrait_size + 10
+        self.health_rect = pygame.Rect(bar_x, self.portrait_rect.y, bar_width, bar_height)
+        self.mana_rect = self.health_rect.move(0, bar_height + gap_between_bars)
+        self.stamina_rect = self.mana_rect.move(0, bar_height + gap_between_bars)
+
+        # The action bar showing available abilities, along the bottom of the screen
+        self.action_bar_x = 20
+        self.action_bar_y = self.screen_height - 70
+        self.icon_size = 50
+        self.icon_padding = 10
+        self.action_bar_rect = pygame.Rect(0, self.action_bar_y, self.screen_width, self.icon_size)
+
+        # The casting bar is positioned above the action bar, with the ability name above it
+        self.casting_bar_rect = (20, self.screen_height - 140, self.screen_width - 40, 20)
+        self.casting_widget_rect = pygame.Rect(0, self.casting_bar_rect[1] - 25, self.screen_width, 25 + self.casting_bar_rect[3])
+
+        # Widgets in drawing order, with the area each one covers
+        self.widgets = [
+            ("xp", self.xp_rect, self.draw_xp_bar),
+            ("portrait", self.portrait_rect, self.draw_portrait),
+            ("health", self.health_rect, self.draw_health_bar),
+            ("mana", self.mana_rect, self.draw_mana_bar),
+            ("stamina", self.stamina_rect, self.draw_stamina_bar),
+            ("casting_bar", self.casting_widget_rect, self.draw_casting_bar),
+            ("action_bar", self.action_bar_rect, self.draw_action_bar),
+        ]
+        # The portrait and the bars overlap, so they are copied to the screen as one area
+        self.status_rect = self.portrait_rect.unionall([self.health_rect, self.mana_rect, self.stamina_rect])
@@ -0,0 +1,99 @@
+from src.entities.enemy import Enemy
+
+try:
+    import numpy as np
+except ImportError:  # Only needed to schedule the vectorized enemy pool
+    np = None
+
+
+class AIScheduler:
+    # (max distance to the player in pixels, update interval in ticks), nearest first:
+    # everything on screen every tick, the surroundings every 4th tick, and enemies beyond the last tier are dormant
+    DEFAULT_TIERS = ((1000, 1), (2000, 4))
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        """
+        Level of detail for enemy AI: enemies are updated at a rate depending on their distance to the player.
+        Enemies of a tier are spread evenly over its interval by a slot given to each enemy when it is added,
+        and an update covers all the time elapsed since the enemy's previous one.
+        :param tiers: (max distance in pixels, update interval in ticks) per tier.
+        """
+        self.tiers = sorted(tiers)
+        self.tick = 0
+        self.time = 0.0  # Simulation seconds since the first tick
+        self.next_slot = 0
+        self.updated = 0  # Number of enemies updated in the last tick
+
+    def register(self, enemy):
+        """Give an enemy its stagger slot; called when it enters the simulation."""
+        enemy.ai_slot = self.next_slot
+        enemy.ai_updated_time = None
+        self.next_slot += 1
+
+    def begin_tick(self, delta_time):
+        self.tick += 1
+        self.time += delta_time
+
+    def interval(self, distance_squared):
+        """Return the update interval in ticks for a distance to the player, or None if the enemy is dormant."""
+        for radius, interval in self.tiers:
+            if distance_squared <= radius * radius:
+                return interval
+        return None
+
+    def elapsed(self, last_time, interval, delta_time):
+        """Time to simulate for an update; capped at the tier's interval so waking from dormancy does not jump."""
+        if last_time is None:
+            return delta_time
+        return min(self.time - last_time, interval * delta_time)
+
+    def due_enemies(self, spatial_hash, center, delta_time, enemies=None):
+        """
+        Return the enemies to update this tick with the delta time of each.
+        Only the spatial hash cells within the last tier are visited, so the cost depends on the nearby enemies alone;
+        when there are fewer enemies than cells to visit, the enemies are checked directly instead.
+        :param spatial_hash: Index of the enemies.
+        :param center: Pixel position of the player's center.
+        :param delta_time: Duration of a tick in seconds.
+        :param enemies: The active enemies in spawn order, or None to always query the spatial hash.
+        :return: List of (enemy, delta time) pairs, in spawn order.
+        """
+        center_x, center_y = center
+        radius = self.tiers[-1][0]
+        from_hash = enemies is None or len(enemies) >= spatial_hash.range_cells(*spatial_hash.radius_range(center, radius))
+        # Enemies beyond the last tier are skipped below as dormant
+        nearby = spatial_hash.query_radius(center, radius) if from_hash else enemies
+        due = []
+        for obj in nearby:
+            if not isinstance(obj, Enemy):
+                continue
+            enemy_x, enemy_y = obj.sprite.rect.center
+            interval = self.interval((enemy_x - center_x) ** 2 + (enemy_y - center_y) ** 2)
+            if interval is None or (self.tick + obj.ai_slot) % interval:
+                continue
+            due.append((obj, self.elapsed(obj.ai_updated_time, interval, delta_time)))
+            obj.ai_updated_time = self.time
+        if from_hash:
+            due.sort(key=lambda pair: pair[0].ai_slot)  # Keep the update order independent of the hash layout
+        self.updated = len(due)
+        return due
+
+    def pool_deltas(self, pool, center, delta_time):
+        """
+        Return the delta time of every enemy of an EnemyPool for this tick; 0 for enemies that are not due.
+        :param pool: The EnemyPool, whose ai_slot and ai_updated_time arrays are read and updated.
+        :param center: Pixel position of the player's center.
+        :param delta_time: Duration of a tick in seconds.
+        """
+        n = pool.count
+        distance_squared = (pool.x[:n] + pool.width[:n] / 2 - center[0]) ** 2 + (pool.y[:n] + pool.height[:n] / 2 - center[1]) ** 2
+        interval = np.zeros(n, dtype=np.int64)  # 0 for dormant enemies
+        for radius, tier_interval in reversed(self.tiers):
+            interval[distance_squared <= radius * radius] = tier_interval
+
+        due = (interval > 0) & ((self.tick + pool.ai_slot[:n]) % np.maximum(interval, 1) == 0)
+        last_time = pool.ai_updated_time[:n]
+        elapsed = np.where(np.isnan(last_time), delta_time, np.minimum(self.time - last_time, interval * delta_time))
+        last_time[due] = self.time
+        self.updated = int(due.sum())
+        return np.where(due, elapsed, 0.0)
@@ -0,0 +1,328 @@
+from src.entities.enemy import Enemy
+from src.game.flow_field import FlowField
+from src.utilities.profiler import profiler
+
+try:
+    import numpy as np
+except ImportError:  # The vectorized pool is optional; Map falls back to per-enemy updates
+    np = None
+
+
+class EnemyPool:
+    # State codes stored in the state array
+    WANDER, PATROL, CHASE = 0, 1, 2
+    STATE_NAMES = (Enemy.WANDER, Enemy.PATROL, Enemy.CHASE)
+
+    # Per-enemy state arrays and their types
+    FIELDS = {
+        "x": np.float64, "y": np.float64,
+        "width": np.int64, "height": np.int64,
+        "direction_x": np.float64, "direction_y": np.float64,
+        "speed": np.float64, "chase_range": np.float64, "health": np.float64,
+        "state": np.int8, "patrolling": np.bool_, "casting": np.bool_, "player_collision": np.bool_,
+        # Values last written back to the Enemy objects
+        "synced_x": np.int64, "synced_y": np.int64, "synced_state": np.int8, "synced_collision": np.bool_,
+        # Level of detail scheduling, see AIScheduler; NaN until the first update
+        "ai_slot": np.int64, "ai_updated_time": np.float64,
+    } if np is not None else {}
+
+    # Cell offsets of each flow field step index (FlowField.NO_STEP maps to no offset)
+    STEP_COL = np.array([step[0] for step in FlowField.NEIGHBOURS] + [0] * (256 - len(FlowField.NEIGHBOURS))) if np is not None else None
+    STEP_ROW = np.array([step[1] for step in FlowField.NEIGHBOURS] + [0] * (256 - len(FlowField.NEIGHBOURS))) if np is not None else None
+
+    def __init__(self, capacity=64, seed=None):
+        """
+        Struct-of-arrays storage for enemies, updated in batched NumPy operations.
+        The Enemy objects stay usable for abilities and drawing: the pool writes their
+        rect, state, target and player collision flag back whenever those change.
+        Enemies must not be larger than a map tile.
+        :param capacity: Initial number of enemy slots.
+        :param seed: Optional seed for the wander random walk.
+        """
+        if np is None:
+            raise RuntimeError("EnemyPool requires numpy")
+        self.enemies = []  # Slot index -> Enemy
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+        self.bucket_start = None  # Per map cell: first sorted slot of the enemies in it
+        self.bucket_count = None  # Per map cell: number of enemies in it
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """Create (or grow) the state arrays, keeping the existing slots."""
+        for name, dtype in self.FIELDS.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if self.count:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def add(self, enemy):
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+        i = self.count
+        rect = enemy.sprite.rect
+        self.x[i], self.y[i] = rect.x, rect.y
+        self.width[i], self.height[i] = rect.width, rect.height
+        self.direction_x[i], self.direction_y[i] = enemy.direction
+        self.speed[i] = enemy.speed
+        self.chase_range[i] = enemy.chase_range
+        self.health[i] = enemy.health
+        self.patrolling[i] = hasattr(enemy, "patrol_points")
+        self.casting[i] = enemy.is_casting
+        self.player_collision[i] = enemy.player_collision
+        self.state[i] = EnemyPool.STATE_NAMES.index(enemy.state) if enemy.state in EnemyPool.STATE_NAMES else EnemyPool.WANDER
+        self.synced_x[i], self.synced_y[i] = rect.x, rect.y
+        self.synced_state[i], self.synced_collision[i] = self.state[i], enemy.player_collision
+        self.ai_slot[i] = enemy.ai_slot
+        self.ai_updated_time[i] = np.nan if enemy.ai_updated_time is None else enemy.ai_updated_time
+        enemy.pool, enemy.pool_index = self, i
+        self.enemies.append(enemy)
+        self.count += 1
+
+    def remove(self, enemy):
+        """Remove an enemy by moving the last slot into its place."""
+        i, last = enemy.pool_index, self.count - 1
+        if i != last:
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[i] = array[last]
+            moved = self.enemies[last]
+            self.enemies[i] = moved
+            moved.pool_index = i
+        self.enemies.pop()
+        self.count -= 1
+        enemy.pool, enemy.pool_index = None, None
+
+    def dead_enemies(self):
+        """Return the enemies whose health reached zero."""
+        return [self.enemies[i] for i in np.flatnonzero(self.health[:self.count] <= 0)]
+
+    def update(self, delta_time, occupancy_grid, spatial_hash, player, flow_field=None):
+        """
+        Pick states, steer and move every enemy.
+        :param delta_time: Seconds to simulate, for all enemies or per enemy (see AIScheduler.pool_deltas);
+                           enemies with a delta time of 0 are left as they are.
+        """
+        if self.count == 0:
+            return
+        self.simulate(delta_time, occupancy_grid, player.sprite.rect, flow_field)
+        with profiler.scope("enemy_pool.sync_views"):
+            self.sync_views(spatial_hash, player)
+
+    def simulate(self, delta_time, occupancy_grid, player_rect, flow_field=None):
+        """Pick the states, steer and move the enemies in the state arrays, without touching the Enemy objects."""
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        direction_x, direction_y = self.direction_x[:n], self.direction_y[:n]
+        speed, state = self.speed[:n], self.state[:n]
+        delta_time = np.broadcast_to(np.asarray(delta_time, dtype=np.float64), (n,))
+        updating = delta_time > 0
+
+        # Pick the state of every updated enemy from its distance to the player
+        to_player_x, to_player_y = player_rect.x - x, player_rect.y - y
+        distance = np.sqrt(to_player_x ** 2 + to_player_y ** 2)
+        new_state = np.where(distance <= self.chase_range[:n], EnemyPool.CHASE, np.where(self.patrolling[:n], EnemyPool.PATROL, EnemyPool.WANDER))
+        state[updating] = new_state[updating]
+        chasing = (state == EnemyPool.CHASE) & updating
+        wandering = (state == EnemyPool.WANDER) & updating
+
+        # Wandering enemies change direction occasionally (1% chance per tick)
+        turning = wandering & (self.rng.random(n) < 0.01)
+        turn_count = int(turning.sum())
+        if turn_count:
+            direction_x[turning] = self.rng.choice((-1.0, 1.0), turn_count)
+            direction_y[turning] = self.rng.choice((-1.0, 1.0), turn_count)
+
+        # Chasing enemies steer straight at the player, or along the flow field around walls
+        steering = chasing & (distance != 0)
+        direction_x[steering] = to_player_x[steering] / distance[steering]
+        direction_y[steering] = to_player_y[steering] / distance[steering]
+        if flow_field is not None:
+            self.steer_along_flow_field(chasing, speed * delta_time, occupancy_grid, flow_field)
+
+        self.steer_patrolling((state == EnemyPool.PATROL) & updating)
+
+        step = np.where(wandering, speed / 2, speed) * delta_time * ~self.casting[:n]
+        self.player_collision[:n] = False
+        self.move_axis(0, direction_x * step, occupancy_grid, player_rect, chasing)
+        self.move_axis(1, direction_y * step, occupancy_grid, player_rect, chasing)
+
+    def steer_along_flow_field(self, chasing, step_length, occupancy_grid, flow_field):
+        """
+        Point chasing enemies that have a flow field step at their next cell, like Enemy.steer_to_cell.
+        :param step_length: Per enemy, the distance moved this tick in pixels.
+        """
+        n = self.count
+        tile_width, tile_height = occupancy_grid.tile_width, occupancy_grid.tile_height
+        x, y, width, height = self.x[:n], self.y[:n], self.width[:n], self.height[:n]
+        col = ((x + width / 2) // tile_width).astype(np.int64)
+        row = ((y + height / 2) // tile_height).astype(np.int64)
+        local_col, local_row = col - flow_field.origin[0], row - flow_field.origin[1]
+        inside = chasing & (local_col >= 0) & (local_col < flow_field.size) & (local_row >= 0) & (local_row < flow_field.size)
+
+        directions = np.frombuffer(flow_field.directions, dtype=np.uint8)
+        step = np.full(n, FlowField.NO_STEP, dtype=np.uint8)
+        step[inside] = directions[local_row[inside] * flow_field.size + local_col[inside]]
+        following = step != FlowField.NO_STEP
+        next_col = col + EnemyPool.STEP_COL[step]
+        next_row = row + EnemyPool.STEP_ROW[step]
+        following &= ((next_col != flow_field.player_cell[0]) | (next_row != flow_field.player_cell[1])) & (step_length > 0)
+
+        if not following.any():
+            return
+
+        # Each axis moves at most the remaining distance, so enemies line up with corridors
+        step_length = step_length[following]
+        steer_x = np.clip((next_col * tile_width + (tile_width - width) // 2 - x)[following] / step_length, -1.0, 1.0)
+        steer_y = np.clip((next_row * tile_height + (tile_height - height) // 2 - y)[following] / step_length, -1.0, 1.0)
+        length = np.maximum(1.0, np.sqrt(steer_x ** 2 + steer_y ** 2))
+        self.direction_x[:n][following] = steer_x / length
+        self.direction_y[:n][following] = steer_y / length
+
+    def steer_patrolling(self, patrolling):
+        for i in np.flatnonzero(patrolling).tolist():
+            self.steer_to_patrol_point(i)
+
+    def steer_to_patrol_point(self, i):
+        enemy = self.enemies[i]
+        target_x, target_y = enemy.patrol_points[enemy.patrol_index]
+        if abs(target_x - self.x[i]) < 5 and abs(target_y - self.y[i]) < 5:
+            enemy.patrol_index = (enemy.patrol_index + 1) % len(enemy.patrol_points)
+            target_x, target_y = enemy.patrol_points[enemy.patrol_index]
+        vector_x, vector_y = target_x - self.x[i], target_y - self.y[i]
+        distance = (vector_x ** 2 + vector_y ** 2) ** 0.5
+        if distance != 0:
+            self.direction_x[i], self.direction_y[i] = vector_x / distance, vector_y / distance
+
+    def move_axis(self, axis, delta, occupancy_grid, player_rect, chasing):
+        """Move every enemy along one axis, reversing direction for those that would collide."""
+        n = self.count
+        position = self.x[:n] if axis == 0 else self.y[:n]
+        direction = self.direction_x[:n] if axis == 0 else self.direction_y[:n]
+        width, height = self.width[:n], self.height[:n]
+        active = delta != 0
+        if not active.any():
+            return
+
+        left, top = np.rint(self.x[:n]).astype(np.int64), np.rint(self.y[:n]).astype(np.int64)
+        proposed = np.rint(position + delta).astype(np.int64)
+        new_left, new_top = (proposed, top) if axis == 0 else (left, proposed)
+
+        blocked = self.hits_solid_cells(new_left, new_top, width, height, occupancy_grid)
+
+        # Only chasing enemies collide with the player, as in Enemy.move
+        hits_player = chasing & (new_left < player_rect.right) & (new_left + width > player_rect.left) \
+            & (new_top < player_rect.bottom) & (new_top + height > player_rect.top)
+        self.player_collision[:n] |= hits_player & active
+        blocked |= hits_player
+
+        blocked |= self.hits_other_enemies(new_left, new_top, left, top, width, height, occupancy_grid)
+        moving = active & ~blocked
+
+        # Enemies that moved into the same free space this tick both stay where they were
+        settled_left = np.where(moving & (axis == 0), new_left, left)
+        settled_top = np.where(moving & (axis == 1), new_top, top)
+        conflicts = moving & self.hits_other_enemies(settled_left, settled_top, settled_left, settled_top, width, height, occupancy_grid)
+        moving &= ~conflicts
+
+        position[moving] += delta[moving]
+        direction[active & ~moving] *= -1
+
+    def hits_solid_cells(self, left, top, width, height, occupancy_grid):
+        """Check the four corner cells of each rect against the wall and door flags."""
+        cells = np.frombuffer(occupancy_grid.cells, dtype=np.uint8).reshape(occupancy_grid.height, occupancy_grid.width)
+        hit = np.zeros(len(left), dtype=np.bool_)
+        for corner_x, corner_y in ((left, top), (left + width - 1, top), (left, top + height - 1), (left + width - 1, top + height - 1)):
+            col, row = corner_x // occupancy_grid.tile_width, corner_y // occupancy_grid.tile_height
+            inside = (col >= 0) & (col < occupancy_grid.width) & (row >= 0) & (row < occupancy_grid.height)
+            flags = np.zeros(len(left), dtype=np.uint8)
+            flags[inside] = cells[row[inside], col[inside]]
+            hit |= (flags & occupancy_grid.SOLID) != 0
+        return hit
+
+    def hits_other_enemies(self, new_left, new_top, left, top, width, height, occupancy_grid):
+        """
+        Test each proposed rect against every other enemy's current rect.
+        Enemies are bucketed by the map cell holding their top-left corner; since no enemy is
+        larger than a cell, only the 3x3 neighbouring buckets have to be checked.
+        """
+        n = len(new_left)
+        grid_width, grid_height = occupancy_grid.width, occupancy_grid.height
+        if self.bucket_start is None or self.bucket_start.size != grid_width * grid_height:
+            self.bucket_start = np.zeros(grid_width * grid_height, dtype=np.int32)
+            self.bucket_count = np.zeros(grid_width * grid_height, dtype=np.int32)
+
+        cols = np.clip(left // occupancy_grid.tile_width, 0, grid_width - 1)
+        rows = np.clip(top // occupancy_grid.tile_height, 0, grid_height - 1)
+        buckets = rows * grid_width + cols
+        order = np.argsort(buckets, kind="stable")
+        sorted_buckets = buckets[order]
+        run_starts = np.flatnonzero(np.diff(sorted_buckets, prepend=-1))
+        used = sorted_buckets[run_starts]
+        self.bucket_start[used] = run_starts
+        self.bucket_count[used] = np.diff(np.append(run_starts, n))
+
+        new_col, new_row = new_left // occupancy_grid.tile_width, new_top // occupancy_grid.tile_height
+        own = np.arange(n)
+        hit = np.zeros(n, dtype=np.bool_)
+        for offset_col in (-1, 0, 1):
+            for offset_row in (-1, 0, 1):
+                col, row = new_col + offset_col, new_row + offset_row
+                inside = (col >= 0) & (col < grid_width) & (row >= 0) & (row < grid_height)
+                query = np.where(inside, row * grid_width + col, 0)
+                first = self.bucket_start[query]
+                count = np.where(inside, self.bucket_count[query], 0)
+                for run in range(int(count.max())):
+                    valid = run < count
+                    other = order[np.minimum(first + run, n - 1)]
+                    hit |= valid & (other != own) \
+                        & (new_left < left[other] + width[other]) & (left[other] < new_left + width) \
+                        & (new_top < top[other] + height[other]) & (top[other] < new_top + height)
+
+        self.bucket_count[used] = 0  # Leave the buckets empty for the next call
+        return hit
+
+    def sync_views(self, spatial_hash, player):
+        """Write the batched results back to the Enemy objects that changed."""
+        n = self.count
+        xs = np.rint(self.x[:n]).astype(np.int64)
+        ys = np.rint(self.y[:n]).astype(np.int64)
+        moved = (xs != self.synced_x[:n]) | (ys != self.synced_y[:n])
+        for i in np.flatnonzero(moved).tolist():
+            self.enemies[i].sprite.rect.topleft = (int(xs[i]), int(ys[i]))
+
+        # Only enemies that crossed into other spatial hash cells have to be re-indexed
+        size, width, height = spatial_hash.cell_size, self.width[:n], self.height[:n]
+        old_x, old_y = self.synced_x[:n], self.synced_y[:n]
+        changed_cells = moved & ((xs // size != old_x // size) | ((xs + width - 1) // size != (old_x + width - 1) // size)
+                                 | (ys // size != old_y // size) | ((ys + height - 1) // size != (old_y + height - 1) // size))
+        for i in np.flatnonzero(changed_cells).tolist():
+            spatial_hash.update(self.enemies[i])
+        self.synced_x[:n], self.synced_y[:n] = xs, ys
+
+        state = self.state[:n]
+        for i in np.flatnonzero(state != self.synced_state[:n]).tolist():
+            enemy = self.enemies[i]
+            enemy.state = EnemyPool.STATE_NAMES[state[i]]
+            enemy.target = player if state[i] == EnemyPool.CHASE else None
+        self.synced_state[:n] = state
+
+        collision = self.player_collision[:n]
+        for i in np.flatnonzero(collision != self.synced_collision[:n]).tolist():
+            enemy = self.enemies[i]
+            enemy.player_collision = bool(collision[i])
+            if enemy.player_collision:
+                player.enemy_collisions.append(enemy)
+            elif enemy in player.enemy_collisions:
+                player.enemy_collisions.remove(enemy)
+        self.synced_collision[:n] = collision
+
+    def use_abilities(self, occupancy_grid, player):
+        """Run ability logic only for enemies that have a target or are mid-cast."""
+        n = self.count
+        with profiler.scope("enemy.abilities"):
+            for i in np.flatnonzero((self.state[:n] == EnemyPool.CHASE) | self.casting[:n]).tolist():
+                enemy = self.enemies[i]
+                enemy.use_ability(player, occupancy_grid)
+                self.casting[i] = enemy.is_casting
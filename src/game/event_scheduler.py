@@ -0,0 +1,49 @@
+import heapq
+
+
+class EventScheduler:
+    def __init__(self):
+        """
+        Timed callbacks kept in a heap ordered by due time, e.g. ability cooldowns ending and casts completing.
+        Entities schedule an event once instead of checking a timer every tick.
+        """
+        self.queue = []  # Heap of [due time, sequence, callback, args]; cancelled events have no callback
+        self.sequence = 0  # Keeps events due at the same time in scheduling order
+
+    def schedule(self, due_time, callback, *args):
+        """
+        Call callback(*args) once the time reaches due_time.
+        :param due_time: Time at which the event fires, on the clock passed to run_due.
+        :return: The event, which can be passed to cancel.
+        """
+        event = [due_time, self.sequence, callback, args]
+        self.sequence += 1
+        heapq.heappush(self.queue, event)
+        return event
+
+    def cancel(self, event):
+        """Stop an event from firing; it is dropped from the heap when its time comes."""
+        if event is not None:
+            event[2] = None
+
+    def run_due(self, now):
+        """
+        Fire every event due at or before now, in order of due time.
+        :return: Number of events fired.
+        """
+        fired = 0
+        while self.queue and self.queue[0][0] <= now:
+            _, _, callback, args = heapq.heappop(self.queue)
+            if callback is not None:
+                callback(*args)
+                fired += 1
+        return fired
+
+    def next_due_time(self):
+        """Return the due time of the earliest pending event, or None if there is none."""
+        while self.queue and self.queue[0][2] is None:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else None
+
+    def __len__(self):
+        return sum(1 for event in self.queue if event[2] is not None)
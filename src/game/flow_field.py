@@ -0,0 +1,106 @@
+import heapq
+
+from src.game.occupancy_grid import OccupancyGrid
+
+
+class FlowField:
+    # Steps to the eight neighbouring cells: (d col, d row, cost); diagonals cost ~sqrt(2) times more
+    NEIGHBOURS = [(1, 0, 10), (-1, 0, 10), (0, 1, 10), (0, -1, 10), (1, 1, 14), (-1, -1, 14), (1, -1, 14), (-1, 1, 14)]
+    # Index of the opposite step of each neighbour
+    OPPOSITE = [1, 0, 3, 2, 5, 4, 7, 6]
+    NO_STEP = 255
+    UNREACHED = 0xFFFFFFFF
+    # Occupancy flags -> 1 for cells that cannot be crossed, as a bytes.translate table
+    BLOCKED = bytes(1 if flags & OccupancyGrid.SOLID else 0 for flags in range(256))
+
+    def __init__(self, occupancy_grid, radius=16):
+        """
+        Shortest paths towards the player over the occupancy grid, shared by every chasing enemy.
+        The field covers a square window of cells around the player and is only rebuilt when the
+        player changes cell or a cell of the grid changes (e.g. a door opens).
+        :param occupancy_grid: The level's OccupancyGrid; solid cells cannot be crossed.
+        :param radius: Half the side of the window, in cells.
+        """
+        self.grid = occupancy_grid
+        self.radius = radius
+        self.size = radius * 2 + 1
+        self.player_cell = None
+        self.grid_version = None
+        self.origin = (0, 0)  # Cell at the top left corner of the window
+        self.distances = []  # Per window cell: path cost to the player's cell
+        self.directions = bytearray()  # Per window cell: index in NEIGHBOURS of the next step, or NO_STEP
+        self.rebuilds = 0
+
+    def update(self, player_cell):
+        """
+        Rebuild the field if the player moved to another cell or the grid changed since the last build.
+        :return: True if the field was rebuilt.
+        """
+        if player_cell == self.player_cell and self.grid.version == self.grid_version:
+            return False
+        self.player_cell = player_cell
+        self.grid_version = self.grid.version
+        self.build()
+        return True
+
+    def build(self):
+        """Run Dijkstra from the player's cell over the window, recording each cell's first step back towards it."""
+        grid, size = self.grid, self.size
+        player_col, player_row = self.player_cell
+        origin_col, origin_row = player_col - self.radius, player_row - self.radius
+        self.origin = (origin_col, origin_row)
+        self.rebuilds += 1
+
+        # Work on a copy of the window with a border of blocked cells, so the search needs no bounds checks
+        stride = size + 2
+        blocked = bytearray([1]) * (stride * stride)
+        first_col, last_col = max(0, origin_col), min(grid.width, origin_col + size)
+        for row in range(max(0, origin_row), min(grid.height, origin_row + size)):
+            if first_col < last_col:
+                start = (row - origin_row + 1) * stride + first_col - origin_col + 1
+                cells = grid.cells[row * grid.width + first_col:row * grid.width + last_col]
+                blocked[start:start + len(cells)] = cells.translate(FlowField.BLOCKED)
+
+        distances = [FlowField.UNREACHED] * (stride * stride)
+        steps = [(d_row * stride + d_col, d_col, d_row * stride, cost, FlowField.OPPOSITE[k])
+                 for k, (d_col, d_row, cost) in enumerate(FlowField.NEIGHBOURS)]
+        padded_directions = bytearray([FlowField.NO_STEP]) * (stride * stride)
+        start = (self.radius + 1) * stride + self.radius + 1
+        if grid.in_bounds(player_col, player_row):
+            distances[start] = 0
+            heap = [(0, start)]
+            while heap:
+                distance, index = heapq.heappop(heap)
+                if distance > distances[index]:
+                    continue
+                for offset, col_offset, row_offset, cost, back in steps:
+                    next_index = index + offset
+                    if blocked[next_index]:
+                        continue
+                    # Diagonal steps may not cut the corner of a solid cell
+                    if col_offset and row_offset and (blocked[index + col_offset] or blocked[index + row_offset]):
+                        continue
+                    next_distance = distance + cost
+                    if next_distance < distances[next_index]:
+                        distances[next_index] = next_distance
+                        padded_directions[next_index] = back
+                        heapq.heappush(heap, (next_distance, next_index))
+
+        # Strip the border
+        self.distances = [value for row in range(1, size + 1) for value in distances[row * stride + 1:row * stride + 1 + size]]
+        self.directions = bytearray().join(padded_directions[row * stride + 1:row * stride + 1 + size] for row in range(1, size + 1))
+
+    def local_index(self, col, row):
+        """Return the index of a cell in the window, or None if it lies outside."""
+        local_col, local_row = col - self.origin[0], row - self.origin[1]
+        if 0 <= local_col < self.size and 0 <= local_row < self.size:
+            return local_row * self.size + local_col
+        return None
+
+    def next_cell(self, col, row):
+        """Return the next cell on a shortest path from (col, row) to the player, or None if there is none in range."""
+        index = self.local_index(col, row)
+        if index is None or self.directions[index] == FlowField.NO_STEP:
+            return None
+        d_col, d_row, _ = FlowField.NEIGHBOURS[self.directions[index]]
+        return col + d_col, row + d_row
@@ -1,92 +1,221 @@
+import random
+import time
+
 import pygame
 
 from src.entities.objects.items.item_catalog import ItemCatalog
+from src.game.input_recording import InputRecorder, session_state
 from src.game.map import Map
 from src.menus.character_menu import CharacterMenu
-
-# Initialize Pygame
-pygame.init()
+from src.menus.loading_screen import LoadingScreen
+from src.utilities.asset_loader import AssetLoader
+from src.utilities.file_manager import FileManager
+from src.utilities.log import log
+from src.utilities.profiler import profiler
+from src.utilities.startup_profiler import startup_profiler
 
 # Screen dimensions
 WIDTH, HEIGHT = 1600, 900
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Player Stays in the Middle")
 
 
 class Game:
-    def __init__(self):
-        self.delta_time = None
+    def __init__(self, vectorized_enemies=False, tick_rate=60, max_frame_rate=0, max_catch_up_steps=5, map_file="level.json", map_data=None, profile=False, stream_radius=2, ai_lod=True, seed=None, record=None, enemy_workers=0):
+        """
+        :param map_file: Level to load from the data directory.
+        :param map_data: Rows of tile codes to use instead of loading map_file.
+        :param tick_rate: Simulation ticks per second.
+        :param max_frame_rate: Frame rate cap for rendering; 0 renders as fast as possible.
+        :param max_catch_up_steps: Most simulation ticks run for a single frame, so a slow frame cannot spiral.
+        :param profile: Start with the frame profiler enabled (F3 toggles its overlay, F4 exports a trace).
+        :param stream_radius: Radius in chunks around the player within which the map is instantiated; None loads it all.
+        :param ai_lod: Update distant enemies less often and leave far ones dormant.
+        :param seed: Seed of the simulation's random number generator; None picks one.
+        :param enemy_workers: Simulate enemy movement in this many worker processes; 0 keeps it in this process.
+        :param record: Path of a file to save the input of every tick to when the game quits, for replaying the session.
+        """
+        self.start_time = time.perf_counter()
+        self.time_to_first_frame = None
+
+        # Open the window; the other pygame modules are initialized by their first user (e.g. fonts by the text renderer)
+        with startup_profiler.phase("pygame.display.init"):
+            pygame.display.init()
+        with startup_profiler.phase("open window"):
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("Player Stays in the Middle")
+
+        self.tick_rate = tick_rate
+        self.delta_time = 1.0 / tick_rate  # Every simulation tick advances by the same fixed step
+        self.max_frame_rate = max_frame_rate
+        self.max_catch_up_steps = max_catch_up_steps
+        self.accumulator = 0.0
         self.clock = pygame.time.Clock()
-
-        self.item_catalog = ItemCatalog("items.json")
-        self.map = Map("level.json", self.item_catalog)
-
-        # Initialize Character Menu
-        self.character_menu = CharacterMenu(WIDTH, HEIGHT, self.item_catalog)
+        profiler.set_enabled(profile)
+
+        # A recorded session can only be replayed with the seed it was played with
+        if record is not None and seed is None:
+            seed = random.randrange(2 ** 32)
+        self.record = record
+        self.recorder = None
+        if record is not None:
+            self.recorder = InputRecorder({
+                "map_file": map_file, "seed": seed, "tick_rate": tick_rate, "vectorized_enemies": vectorized_enemies,
+                "stream_radius": stream_radius, "ai_lod": ai_lod, "enemy_workers": enemy_workers,
+            })
+
+        def build_world():
+            item_catalog = ItemCatalog("items.json")
+            return item_catalog, Map(map_file, item_catalog, vectorized_enemies=vectorized_enemies, screen_size=(WIDTH, HEIGHT), map_data=map_data, stream_radius=stream_radius, ai_lod=ai_lod, seed=seed, enemy_workers=enemy_workers)
+
+        # Decode the images and parse the data files in parallel, then build the world on a loader thread
+        loader = AssetLoader()
+        loader.load_images(FileManager.image_files())
+        json_files = ["items.json", "player.json"]
+        if map_data is None and not map_file.endswith(".lvl"):
+            json_files.append(map_file)
+        loader.load_json(json_files)
+        with startup_profiler.phase("load assets"):
+            self.wait_for_loader(loader, "Loading assets")
+        loader.submit("world", build_world)
+        with startup_profiler.phase("build world"):
+            self.wait_for_loader(loader, "Building the world")
+        loader.shutdown()
+        self.item_catalog, self.map = loader.results["world"]
+        self.loaded_time = time.perf_counter()
+        log.info(f"Loaded in {(self.loaded_time - self.start_time) * 1000:.0f} ms")
+
+        # The character menu is built the first time it is opened
+        self.character_menu = None
+
+    def wait_for_loader(self, loader, stage):
+        """Show the loading screen, keeping the window responsive, until the loader has finished its work."""
+        loading_screen = LoadingScreen(self.screen)
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    loader.shutdown()
+                    pygame.quit()
+                    exit()
+            loader.finalize()
+            loading_screen.draw(stage, loader.progress())
+            pygame.display.flip()
+            if loader.done():
+                return
+            loader.wait(1.0 / 60)
 
     def run(self):
         while True:
-            # Calculate delta_time
-            self.delta_time = self.clock.tick(60) / 1000.0
+            # Time since the last frame, added to the simulation time still owed
+            self.accumulator += self.clock.tick(self.max_frame_rate) / 1000.0
+            profiler.begin_frame()
 
             # Handle events, including quit
-            self.handle_events()
-
-            # Update the game logic
-            self.update()
-
-            # Draw everything
-            self.draw()
+            with profiler.scope("handle_events"):
+                self.handle_events()
+
+            # Update the game logic in fixed steps
+            steps = 0
+            while self.accumulator >= self.delta_time and steps < self.max_catch_up_steps:
+                with profiler.scope("update"):
+                    self.update()
+                self.accumulator -= self.delta_time
+                steps += 1
+            if steps == self.max_catch_up_steps:
+                # Drop the backlog instead of trying to catch up over the next frames
+                self.accumulator = min(self.accumulator, self.delta_time)
+
+            # Draw everything, interpolated between the last two ticks
+            with profiler.scope("draw"):
+                self.draw(self.accumulator / self.delta_time)
 
             # Update the display
-            pygame.display.flip()  # Refresh the screen
+            with profiler.scope("flip"):
+                pygame.display.flip()  # Refresh the screen
+            profiler.end_frame()
+
+            if self.time_to_first_frame is None:
+                now = time.perf_counter()
+                self.time_to_first_frame = now - self.start_time
+                log.info(f"First interactive frame after {self.time_to_first_frame * 1000:.0f} ms")
+                startup_profiler.record("first frame", now - self.loaded_time)
+                startup_profiler.report("first frame")
 
     def handle_events(self):
         # Event handling, allowing player to quit
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if self.recorder is not None:
+                    self.recorder.save(self.record, session_state(self.map))
                 pygame.quit()
                 exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and not self.character_menu.menu_open:
-                if event.button == 1:  # Left mouse button is 1
-                    # Handle left-click to select target
-                    if self.map.player:
-                        mouse_pos = pygame.mouse.get_pos()
-                        self.map.player.select_target(mouse_pos, self.map.enemies)
-
-            # Handle opening/closing the character menu
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                # Toggle character menu
-                self.character_menu.update(self.map.player)
-                self.character_menu.toggle_menu()
-
-            # Handle character menu specific events if the menu is open
-            if self.character_menu.menu_open:
-                self.character_menu.handle_event(event, self.map.player)
-
-    def update(self):
+            self.handle_event(event)
+
+    def handle_event(self, event):
+        """Handle an input event; events that affect the simulation are recorded when recording."""
+        # Profiler overlay and trace export, which are not part of a recorded session
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profiler.toggle_overlay()
+            return
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            profiler.export_chrome_trace("profile_trace.json")
+            return
+
+        if self.recorder is not None:
+            self.recorder.record_event(event)
+        if event.type == pygame.MOUSEBUTTONDOWN and not self.menu_open():
+            if event.button == 1:  # Left mouse button is 1
+                # Handle left-click to select target
+                if self.map.player:
+                    self.map.player.select_target(event.pos, self.map.spatial_hash)
+
+        # Handle opening/closing the character menu
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            # Toggle character menu, building it the first time it is opened
+            if self.character_menu is None:
+                self.character_menu = CharacterMenu(WIDTH, HEIGHT, self.item_catalog)
+            self.character_menu.update(self.map.player)
+            self.character_menu.toggle_menu()
+
+        # Handle character menu specific events if the menu is open
+        if self.menu_open():
+            self.character_menu.handle_event(event, self.map.player)
+
+    def menu_open(self):
+        return self.character_menu is not None and self.character_menu.menu_open
+
+    def update(self, keys=None):
+        """
+        Advance the simulation by one tick.
+        :param keys: Key state to use instead of the keyboard (anything indexable by key code).
+        """
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        if self.recorder is not None:
+            self.recorder.record_tick(keys)
+
         # Update map (player, enemies, and any other entities) only if menu is not open
-        if not self.character_menu.menu_open:
+        if not self.menu_open():
             if self.map.player:
-                keys = pygame.key.get_pressed()
                 self.map.player.handle_input(keys)
                 # Ability keys (e.g., 1 for Fireball, 2 for another ability, etc.)
                 if keys[pygame.K_1]:
-                    self.map.player.use_ability(0, self.map.collidable_tiles)
+                    self.map.player.use_ability(0, self.map.occupancy_grid)
                 elif keys[pygame.K_2]:
-                    self.map.player.use_ability(1, self.map.collidable_tiles)
+                    self.map.player.use_ability(1, self.map.occupancy_grid)
 
             self.map.update(self.delta_time)
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         # Clear the screen
-        screen.fill((0, 0, 0))  # Fill screen with black
+        self.screen.fill((0, 0, 0))  # Fill screen with black
 
         # Calculate the offset to keep the player centered
-        if not self.character_menu.menu_open:
+        if not self.menu_open():
             # Draw map and all entities
-            self.map.draw(screen)
+            self.map.draw(self.screen, alpha)
 
         # Draw the character menu if it is open
-        if self.character_menu.menu_open:
-            self.character_menu.draw(screen, self.map.player)
+        if self.menu_open():
+            with profiler.scope("character_menu.draw"):
+                self.character_menu.draw(self.screen, self.map.player)
+
+        profiler.draw_overlay(self.screen)
@@ -0,0 +1,65 @@
+import time
+
+from src.entities.objects.items.item_catalog import ItemCatalog
+from src.game.map import Map
+from src.utilities.startup_profiler import startup_profiler
+
+# Screen size the HUD and target picking are laid out for, matching the windowed game
+SCREEN_SIZE = (1600, 900)
+
+
+class HeadlessRunner:
+    def __init__(self, map_file="level.json", tick_rate=60, vectorized_enemies=False, stream_radius=2, ai_lod=True, seed=None, enemy_workers=0):
+        """
+        Runs the simulation without a window or any drawing, as fast as possible.
+        :param map_file: Level to load from the data directory.
+        :param tick_rate: Simulation ticks per second of game time; sets the fixed delta time.
+        :param vectorized_enemies: Use the NumPy enemy pool when available.
+        :param stream_radius: Radius in chunks around the player within which the map is instantiated; None loads it all.
+        :param ai_lod: Update distant enemies less often and leave far ones dormant.
+        :param seed: Seed of the simulation's random number generator; None seeds it from the system.
+        :param enemy_workers: Simulate enemy movement in this many worker processes; 0 keeps it in this process.
+        """
+        # Nothing is drawn, so no pygame module is initialized; the player's HUD is only built when first drawn
+        self.delta_time = 1.0 / tick_rate
+        self.ticks = 0
+
+        start = time.perf_counter()
+        with startup_profiler.phase("build world"):
+            self.item_catalog = ItemCatalog("items.json")
+            self.map = Map(map_file, self.item_catalog, vectorized_enemies=vectorized_enemies, screen_size=SCREEN_SIZE, stream_radius=stream_radius, ai_lod=ai_lod, seed=seed, enemy_workers=enemy_workers)
+        self.load_time = time.perf_counter() - start
+        startup_profiler.report("simulation ready")
+
+    def run(self, ticks=None, duration=None, report_interval=1.0):
+        """
+        Update the map until the tick count or wall-clock duration is reached.
+        :param ticks: Number of simulation ticks to run.
+        :param duration: Number of seconds to run for.
+        :param report_interval: Seconds between progress lines; None disables them.
+        :return: Dictionary with the tick count, elapsed seconds and ticks per second.
+        """
+        if ticks is None and duration is None:
+            raise ValueError("HeadlessRunner.run needs a tick count or a duration")
+
+        start = last_report = time.perf_counter()
+        ticks_at_last_report = run_ticks = 0
+        while True:
+            now = time.perf_counter()
+            if (ticks is not None and run_ticks >= ticks) or (duration is not None and now - start >= duration):
+                break
+            self.map.update(self.delta_time)
+            run_ticks += 1
+
+            if report_interval is not None and now - last_report >= report_interval:
+                print(f"{(run_ticks - ticks_at_last_report) / (now - last_report):.1f} ticks/s, {len(self.map.enemies)} enemies")
+                last_report, ticks_at_last_report = now, run_ticks
+
+        elapsed = time.perf_counter() - start
+        self.ticks += run_ticks
+        return {
+            "ticks": run_ticks,
+            "seconds": elapsed,
+            "ticks_per_second": run_ticks / elapsed if elapsed > 0 else 0.0,
+            "load_seconds": self.load_time,
+        }
@@ -0,0 +1,89 @@
+import json
+import zlib
+
+import pygame
+
+
+class RecordedKeys:
+    """Key state of a recorded tick; indexable by key code like pygame.key.get_pressed()."""
+
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+def session_state(game_map):
+    """
+    Summary of the simulation state, saved with a recording and compared after replaying it.
+    :param game_map: The Map of the session.
+    """
+    player = game_map.player
+    positions = sorted((enemy.sprite.rect.x, enemy.sprite.rect.y, enemy.health) for enemy in game_map.enemies)
+    return {
+        "player": [player.sprite.rect.x, player.sprite.rect.y, player.health, player.mana] if player else None,
+        "enemies": game_map.enemy_count(),
+        "enemy_checksum": zlib.crc32(json.dumps(positions).encode("utf-8")),
+    }
+
+
+class InputRecorder:
+    VERSION = 1
+    # Keys read by Game.update every tick
+    KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_1, pygame.K_2)
+
+    def __init__(self, config):
+        """
+        Records the input of every simulation tick so the session can be replayed deterministically.
+        :param config: Everything needed to rebuild the session: seed, tick rate, map file and map options.
+        """
+        self.config = config
+        self.ticks = []  # Per tick: [pressed keys, events handled before the tick]
+        self.pending_events = []
+
+    def record_event(self, event):
+        """Keep a key press or mouse click handled by the game; it is replayed before the next tick."""
+        if event.type == pygame.KEYDOWN:
+            self.pending_events.append({"type": "key", "key": event.key})
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.pending_events.append({"type": "click", "button": event.button, "pos": list(event.pos)})
+
+    def record_tick(self, keys):
+        """
+        Record the key state used by a tick.
+        :param keys: Key state indexable by key code.
+        """
+        self.ticks.append([[key for key in InputRecorder.KEYS if keys[key]], self.pending_events])
+        self.pending_events = []
+
+    def save(self, filename, final_state=None):
+        """
+        Write the recording as JSON.
+        :param filename: Path of the file to write.
+        :param final_state: Optional session_state at the end of the recording, checked by the replay.
+        """
+        recording = {"version": InputRecorder.VERSION, "config": self.config, "ticks": self.ticks, "final_state": final_state}
+        try:
+            with open(filename, "w") as file:
+                json.dump(recording, file, separators=(",", ":"))
+            print(f"Input recording saved to '{filename}' ({len(self.ticks)} ticks)")
+        except OSError as e:
+            print(f"Error saving input recording to '{filename}': {e}")
+
+    @staticmethod
+    def load(filename):
+        """Read a recording, returning its dictionary with the events as pygame events."""
+        with open(filename, "r") as file:
+            recording = json.load(file)
+        if recording.get("version", 0) > InputRecorder.VERSION:
+            raise ValueError(f"'{filename}' has recording version {recording['version']}, newer than the supported {InputRecorder.VERSION}")
+        for tick in recording["ticks"]:
+            tick[1] = [InputRecorder.to_event(event) for event in tick[1]]
+        return recording
+
+    @staticmethod
+    def to_event(event):
+        if event["type"] == "key":
+            return pygame.event.Event(pygame.KEYDOWN, key=event["key"])
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=event["button"], pos=tuple(event["pos"]))
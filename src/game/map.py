@@ -1,89 +1,382 @@
 import json
 import os
+import random
 
 import pygame
 
-from src.entities.objects.map_tiles.wall import Wall
-from src.entities.objects.map_tiles.floor import Floor
 from src.entities.player import Player
 from src.entities.enemy import Enemy
 from src.entities.objects.map_tiles.door import Door
+from src.game.ai_scheduler import AIScheduler
+from src.game.enemy_pool import EnemyPool, np
+from src.game.event_scheduler import EventScheduler
+from src.game.flow_field import FlowField
+from src.game.occupancy_grid import OccupancyGrid
+from src.game.spatial_hash import SpatialHash
+from src.game.static_layer import StaticLayer
+from src.game.tile_grid import TileGrid
 from src.utilities.file_manager import FileManager
+from src.utilities.game_clock import GameClock
+from src.utilities.level_format import LevelFile
+from src.utilities.log import log
+from src.utilities.profiler import profiler
+from src.utilities.render_queue import RenderQueue
+
+# Occupancy flags of each tile code, as a bytes.translate table
+TILE_FLAGS = bytearray(256)
+TILE_FLAGS[2] = TILE_FLAGS[3] = OccupancyGrid.WALL
+TILE_FLAGS[5] = OccupancyGrid.DOOR
+TILE_FLAGS = bytes(TILE_FLAGS)
 
 
 class Map:
-    def __init__(self, map_file,item_catalog):
-        self.tiles = []
+    def __init__(self, map_file, item_catalog, vectorized_enemies=False, screen_size=None, map_data=None, stream_radius=2, ai_lod=True, seed=None, clock=None, enemy_workers=0):
+        """
+        :param map_file: Level to load from the data directory, as JSON rows or a binary .lvl file.
+        :param item_catalog: Catalog of the items the player can carry.
+        :param vectorized_enemies: Update enemies with the NumPy enemy pool when available.
+        :param screen_size: Size of the screen the player's HUD is laid out for.
+        :param map_data: Rows of tile codes (or a LevelFile) to use instead of loading map_file.
+        :param stream_radius: Chunks within this many chunks of the player's chunk are instantiated;
+                              None instantiates the whole map up front.
+        :param ai_lod: Update distant enemies less often and leave far ones dormant (see AIScheduler);
+                       False updates every enemy every tick.
+        :param seed: Seed of the random number generator shared by the entities; None seeds it from the system.
+        :param clock: Clock the entities read the time from; defaults to a GameClock advanced by every update.
+        :param enemy_workers: Simulate enemy movement in this many worker processes over shared memory (see ShardedEnemyPool);
+                              0 keeps it in this process. Implies vectorized_enemies.
+        """
         self.enemies = []
         self.doors = []  # List to store door objects
         self.player = None
-        self.collidable_tiles = []  # List to store collidable tiles (walls)
         self.item_catalog = item_catalog
 
-        map_data = FileManager.load_json_file(map_file)
-
         # Define the size of each tile
         tile_width, tile_height = 50, 50
+        self.tile_width, self.tile_height = tile_width, tile_height
+
+        # Simulation time and randomness, so that a session can be replayed from its seed and inputs.
+        # Tile variants do not draw from it: TileGrid derives them from a hash of the cell's coordinates.
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.clock = clock if clock is not None else GameClock()
+
+        # Cast completions and cooldown ends of the player's and the enemies' abilities
+        self.event_scheduler = EventScheduler()
+
+        # Use the given rows of tile codes (e.g. a generated level) or load them from the data directory
+        if map_data is None:
+            map_data = FileManager.load_level(map_file)
+
+        # The level is kept as compact rows of tile codes; opened doors and spawned enemies are written back to them.
+        # Binary levels are used in place: their rows are copy-on-write views of the memory-mapped file.
+        variants = None  # Row-major tile variants from the level file, 255 to derive them from the coordinates
+        self.patrol_routes = {}  # (col, row) of an enemy spawn -> patrol points in pixels
+        if isinstance(map_data, LevelFile):
+            self.cells = map_data.rows()
+            variants = map_data.layer("variants")
+            for cell, points in map_data.meta().get("patrol_routes", {}).items():
+                col, row = (int(value) for value in cell.split(","))
+                self.patrol_routes[(col, row)] = [(point_col * tile_width, point_row * tile_height) for point_col, point_row in points]
+        else:
+            self.cells = [bytearray(row) for row in map_data]
+
+        # Wall and door cells are kept as flags for static collision
+        width, height = max(len(row) for row in self.cells), len(self.cells)
+        self.occupancy_grid = OccupancyGrid(width, height, tile_width, tile_height)
+
+        # Index of the player, enemies and doors for collision and picking queries
+        self.spatial_hash = SpatialHash(cell_size=tile_width * 2, bounds=(width * tile_width, height * tile_height))
+
+        # Shortest paths to the player for chasing enemies, shared by all of them
+        self.flow_field = FlowField(self.occupancy_grid)
+
+        # Floors and walls are only a kind per cell, drawn from one shared tileset per kind
+        self.tile_grid = TileGrid(width, height, tile_width, tile_height, variants)
+
+        # Floors, walls and closed doors are baked into chunk surfaces instead of being drawn one by one
+        self.static_layer = StaticLayer(tile_width, tile_height, tile_grid=self.tile_grid)
+
+        # Only the player is created up front; the flags and tile kinds of a chunk are filled in when it is streamed in.
+        # Binary levels take the enemy count from their chunk index and stop reading at the player's cell.
+        if isinstance(map_data, LevelFile):
+            self.unspawned_enemies = map_data.enemy_total()  # Enemy cells in chunks that were never loaded
+            player_cell = map_data.find(1)
+        else:
+            self.unspawned_enemies = sum(row.count(4) for row in self.cells)
+            player_cell = next(((row.index(1), row_idx) for row_idx, row in enumerate(self.cells) if 1 in row), None)
+        if player_cell is not None:
+            # Create the player
+            x, y = player_cell[0] * tile_width, player_cell[1] * tile_height
+            self.player = Player(x, y, tile_width, tile_height, filepath="adam.png", item_catalog=self.item_catalog, screen_size=screen_size, event_scheduler=self.event_scheduler, clock=self.clock)
+            self.spatial_hash.insert(self.player)
+
+        # Positions before the latest tick, used to interpolate rendering between ticks
+        self.previous_positions = {}
+        self.render_area = None  # Area around the last drawn viewport
+        self.render_queue = RenderQueue()
+
+        # Enemies are updated at a rate depending on their distance to the player
+        self.ai_scheduler = AIScheduler() if ai_lod else None
+
+        # Optionally move and pick states for all enemies in batched NumPy operations
+        self.enemy_pool = None
+        if vectorized_enemies or enemy_workers:
+            if np is None:
+                print("Warning: numpy is not installed, falling back to per-enemy updates")
+            elif enemy_workers:
+                # Imported here so that multiprocessing is only loaded when it is used
+                from src.game.sharded_enemy_pool import ShardedEnemyPool
+
+                self.enemy_pool = ShardedEnemyPool(workers=enemy_workers, capacity=64, seed=self.random.getrandbits(32))
+            else:
+                self.enemy_pool = EnemyPool(capacity=64, seed=self.random.getrandbits(32))
+
+        # Doors and enemies are instantiated, and floors and walls baked, per chunk (the static layer's chunks) around the player
+        self.chunk_size = self.static_layer.chunk_size
+        self.chunk_columns = -(-self.occupancy_grid.width // self.chunk_size)
+        self.chunk_rows = -(-self.occupancy_grid.height // self.chunk_size)
+        self.stream_radius = stream_radius
+        # Enemy and door counts per chunk, when the level has a chunk index laid out like the map's chunks
+        self.chunk_index = map_data if isinstance(map_data, LevelFile) and map_data.chunk_size == self.chunk_size else None
+        self.prepared_chunks = set()  # Chunks whose occupancy flags and tile kinds are filled in
+        self.spawned_chunks = set()  # Chunks whose enemies were created
+        self.loaded_chunks = {}  # (chunk_col, chunk_row) -> list of the chunk's doors
+        self.stored_enemies = {}  # (chunk_col, chunk_row) -> list of (x, y, health, mana, stamina, direction x, direction y, patrol points)
+        self.player_chunk = None
+        self.stream_chunks()
+
+    def chunk_at(self, x, y):
+        """Return the key of the chunk containing a pixel position."""
+        return x // (self.tile_width * self.chunk_size), y // (self.tile_height * self.chunk_size)
+
+    def stream_chunks(self):
+        """Instantiate the chunks around the player and store the ones that fell out of range."""
+        if self.stream_radius is None or self.player is None:
+            wanted = [(col, row) for row in range(self.chunk_rows) for col in range(self.chunk_columns)]
+            for key in wanted:
+                if key not in self.loaded_chunks:
+                    self.load_chunk(key)
+            return
+
+        self.player_chunk = self.chunk_at(*self.player.sprite.rect.center)
+        player_col, player_row = self.player_chunk
+
+        # Flags and tile kinds are filled in one chunk beyond the kept ones, so enemies never move over cells that are not
+        prepare_radius = self.stream_radius + 2
+        for row in range(max(0, player_row - prepare_radius), min(self.chunk_rows, player_row + prepare_radius + 1)):
+            for col in range(max(0, player_col - prepare_radius), min(self.chunk_columns, player_col + prepare_radius + 1)):
+                if (col, row) not in self.prepared_chunks:
+                    self.prepare_chunk((col, row))
+
+        for row in range(max(0, player_row - self.stream_radius), min(self.chunk_rows, player_row + self.stream_radius + 1)):
+            for col in range(max(0, player_col - self.stream_radius), min(self.chunk_columns, player_col + self.stream_radius + 1)):
+                if (col, row) not in self.loaded_chunks:
+                    self.load_chunk((col, row))
 
-        # Iterate over the map data and create the appropriate tiles
-        for row_idx, row in enumerate(map_data):
-            for col_idx, tile_value in enumerate(row):
+        # Chunks are kept one chunk beyond the load radius so walking along a chunk border does not thrash
+        def in_keep_range(key):
+            return max(abs(key[0] - player_col), abs(key[1] - player_row)) <= self.stream_radius + 1
+
+        for key in [key for key in self.loaded_chunks if not in_keep_range(key)]:
+            self.unload_chunk(key)
+        for enemy in self.enemies[:]:
+            key = self.chunk_at(*enemy.sprite.rect.center)
+            if not in_keep_range(key):
+                self.store_enemy(enemy, key)
+
+    def prepare_chunk(self, key):
+        """Fill in the occupancy flags and tile kinds of a chunk from its tile codes."""
+        first_col, first_row = key[0] * self.chunk_size, key[1] * self.chunk_size
+        for row_idx in range(first_row, min(first_row + self.chunk_size, len(self.cells))):
+            codes = bytes(self.cells[row_idx][first_col:first_col + self.chunk_size])
+            self.occupancy_grid.set_row(row_idx, codes.translate(TILE_FLAGS), first_col)
+            self.tile_grid.set_row(row_idx, codes, first_col)
+        self.prepared_chunks.add(key)
+
+    def load_chunk(self, key):
+        """Create the doors and enemies of a chunk from the stored tile codes and start drawing it."""
+        if key not in self.prepared_chunks:
+            self.prepare_chunk(key)
+        doors = []
+        tile_width, tile_height = self.tile_width, self.tile_height
+        first_col, first_row = key[0] * self.chunk_size, key[1] * self.chunk_size
+
+        # The cells only have to be read if the chunk index lists doors, or enemies that were not created yet
+        scan_rows = range(first_row, min(first_row + self.chunk_size, len(self.cells)))
+        if self.chunk_index is not None:
+            enemy_count, door_count = self.chunk_index.chunk_counts(*key)
+            if door_count == 0 and (enemy_count == 0 or key in self.spawned_chunks):
+                scan_rows = ()
+        self.spawned_chunks.add(key)
+
+        # Iterate over the chunk's cells; floors and walls are drawn from the tile grid
+        for row_idx in scan_rows:
+            row = self.cells[row_idx]
+            for col_idx in range(first_col, min(first_col + self.chunk_size, len(row))):
+                tile_value = row[col_idx]
                 x, y = col_idx * tile_width, row_idx * tile_height
 
-                if tile_value == 0:
-                    # Create a Floor tile
-                    self.tiles.append(Floor(x, y, tile_width, tile_height, "stone_floor.png", 4, 4))
-                elif tile_value == 1:
-                    # Create the waplayer
-                    if not self.player:
-                        self.player = Player(x, y, tile_width, tile_height, filepath="adam.png", item_catalog=self.item_catalog)
-                    self.tiles.append(Floor(x, y, tile_width, tile_height, "stone_floor.png", 4, 4))
-                elif tile_value == 2:
-                    wall = Wall(x, y, tile_width, tile_height, "stone_walls_x.png", 2, 7)
-                    self.tiles.append(wall)
-                    self.collidable_tiles.append(wall)  # Add wall to collidable tiles list
-                elif tile_value == 3:
-                    # Create a wall tile (horizontal or vertical)
-                    wall = Wall(x, y, tile_width, tile_height, "stone_walls_y.png", 2, 2)
-                    self.tiles.append(wall)
-                    self.collidable_tiles.append(wall)  # Add wall to collidable tiles list
-                elif tile_value == 4:
-                    # Create an enemy
-                    self.enemies.append(Enemy(x, y, tile_width, tile_height, filepath="goblin.png", speed=150))
-                    self.tiles.append(Floor(x, y, tile_width, tile_height, "stone_floor.png", 4, 4))
+                if tile_value == 4:
+                    # Create an enemy; from now on it lives in self.enemies or in the stored enemies
+                    patrol_points = self.patrol_routes.get((col_idx, row_idx))
+                    self.add_enemy(Enemy(x, y, tile_width, tile_height, filepath="goblin.png", patrol_points=patrol_points, speed=150, event_scheduler=self.event_scheduler, clock=self.clock, rng=self.random))
+                    row[col_idx] = 0
+                    self.unspawned_enemies -= 1
                 elif tile_value == 5:
                     # Create a door
-                    door = Door(x, y, tile_width, tile_height, filepath="wooden_door.png")
-                    self.doors.append(door)
-                    self.tiles.append(Floor(x, y, tile_width, tile_height, "stone_floor.png", 4, 4))
-                    self.collidable_tiles.append(door)  # Add door to collidable tiles list for collision detection
+                    doors.append(Door(x, y, tile_width, tile_height, filepath="wooden_door.png"))
+
+        self.static_layer.load(key)
+        for door in doors:
+            self.static_layer.add(door)
+            self.spatial_hash.insert(door)
+        self.doors.extend(doors)
+        for state in self.stored_enemies.pop(key, ()):
+            self.add_enemy(self.restore_enemy(state))
+        self.loaded_chunks[key] = doors
+
+    def unload_chunk(self, key):
+        """Drop a chunk's doors and baked surface; everything else can be recreated from the level."""
+        doors = self.loaded_chunks.pop(key)
+        self.static_layer.unload(key)
+        for door in doors:
+            self.doors.remove(door)
+            self.spatial_hash.remove(door)
+
+    def add_enemy(self, enemy):
+        if self.ai_scheduler is not None:
+            self.ai_scheduler.register(enemy)
+        self.enemies.append(enemy)
+        self.spatial_hash.insert(enemy)
+        if self.enemy_pool is not None:
+            self.enemy_pool.add(enemy)
+
+    def store_enemy(self, enemy, key):
+        """Replace an enemy by a compact record of its state, restored when its chunk is loaded again."""
+        rect = enemy.sprite.rect
+        direction = enemy.direction
+        if enemy.pool is not None:
+            direction = (enemy.pool.direction_x[enemy.pool_index], enemy.pool.direction_y[enemy.pool_index])
+        state = (rect.x, rect.y, enemy.health, enemy.mana, enemy.stamina, float(direction[0]), float(direction[1]), getattr(enemy, "patrol_points", None))
+        self.stored_enemies.setdefault(key, []).append(state)
+        self.detach_enemy(enemy)
+
+    def restore_enemy(self, state):
+        x, y, health, mana, stamina, direction_x, direction_y, patrol_points = state
+        enemy = Enemy(x, y, self.tile_width, self.tile_height, filepath="goblin.png", patrol_points=patrol_points, speed=150, event_scheduler=self.event_scheduler, clock=self.clock, rng=self.random)
+        enemy.health, enemy.mana, enemy.stamina = health, mana, stamina
+        enemy.direction = [direction_x, direction_y]
+        return enemy
+
+    def enemy_count(self):
+        """Return the number of living enemies, including those in stored or never loaded chunks."""
+        return len(self.enemies) + sum(len(states) for states in self.stored_enemies.values()) + self.unspawned_enemies
 
     # In map.py
 
     def update(self, delta_time):
+        self.occupancy_grid.begin_tick()
+        self.store_previous_positions()
+
+        # Complete the casts and end the cooldowns that are due
+        self.clock.advance(delta_time)
+        with profiler.scope("map.events"):
+            self.event_scheduler.run_due(self.clock.now())
+
         # Update player with collision detection against tiles, doors, and enemies
-        self.player.update(delta_time, self.collidable_tiles, self.enemies, self.doors)
+        with profiler.scope("map.update_player"):
+            self.player.update(delta_time, self.occupancy_grid, self.spatial_hash)
+            self.spatial_hash.update(self.player)
+
+        # Stream chunks in and out when the player enters another chunk
+        if self.stream_radius is not None and self.chunk_at(*self.player.sprite.rect.center) != self.player_chunk:
+            with profiler.scope("map.stream_chunks"):
+                self.stream_chunks()
 
-        # Update all enemies with collision detection against tiles, doors, and other enemies
-        for enemy in self.enemies:
-            enemy.update(delta_time, self.collidable_tiles, self.enemies, self.player)
+        # Rebuild the chase paths if the player changed cell or a door opened
+        with profiler.scope("map.flow_field"):
+            self.flow_field.update(self.occupancy_grid.cell_at(*self.player.sprite.rect.center))
 
-            if enemy.health == 0:
-                print("enemy is dead")
-                self.enemies.remove(enemy)
+        # Update the enemies that are due this tick with collision detection against tiles, doors, and other enemies
+        with profiler.scope("map.update_enemies"):
+            if self.enemy_pool is not None:
+                pool_delta_time = delta_time
+                if self.ai_scheduler is not None:
+                    self.ai_scheduler.begin_tick(delta_time)
+                    pool_delta_time = self.ai_scheduler.pool_deltas(self.enemy_pool, self.player.sprite.rect.center, delta_time)
+                self.enemy_pool.update(pool_delta_time, self.occupancy_grid, self.spatial_hash, self.player, self.flow_field)
+                self.enemy_pool.use_abilities(self.occupancy_grid, self.player)
+                for enemy in self.enemy_pool.dead_enemies():
+                    self.remove_enemy(enemy)
+            else:
+                if self.ai_scheduler is not None:
+                    self.ai_scheduler.begin_tick(delta_time)
+                    due = self.ai_scheduler.due_enemies(self.spatial_hash, self.player.sprite.rect.center, delta_time, self.enemies)
+                else:
+                    due = [(enemy, delta_time) for enemy in self.enemies]
+                for enemy, enemy_delta_time in due:
+                    enemy.update(enemy_delta_time, self.occupancy_grid, self.spatial_hash, self.player, self.flow_field)
+                    self.spatial_hash.update(enemy)
+
+                    if enemy.health == 0:
+                        self.remove_enemy(enemy)
 
         # Handle door updates
-        for door in self.doors:
+        for door in self.doors[:]:
             if door.open:
+                col, row = door.sprite.rect.x // self.tile_width, door.sprite.rect.y // self.tile_height
                 self.doors.remove(door)
-                self.collidable_tiles.remove(door)
+                self.loaded_chunks[self.chunk_at(door.sprite.rect.x, door.sprite.rect.y)].remove(door)
+                self.cells[row][col] = 0  # The door stays open when its chunk is reloaded
+                self.occupancy_grid.clear_flag(col, row, OccupancyGrid.DOOR)
+                self.static_layer.remove(door)  # Re-bake the chunk without the door
+                self.spatial_hash.remove(door)
+
+    def remove_enemy(self, enemy):
+        log.info("enemy is dead")
+        self.detach_enemy(enemy)
 
-    def draw(self, screen):
+    def detach_enemy(self, enemy):
+        """Take an enemy out of the simulation and of everything referring to it."""
+        self.enemies.remove(enemy)
+        self.spatial_hash.remove(enemy)
+        if enemy.is_casting:
+            enemy.cancel_cast()
+        if enemy.pool is not None:
+            enemy.pool.remove(enemy)
+        if self.player:
+            if self.player.target is enemy:
+                self.player.target = None
+            if enemy in self.player.enemy_collisions:
+                self.player.enemy_collisions.remove(enemy)
+
+    def store_previous_positions(self):
+        """Remember where the player and the enemies near the last drawn viewport were before this tick."""
+        self.previous_positions = {self.player: self.player.sprite.rect.topleft}
+        if self.render_area is not None:
+            for obj in self.spatial_hash.query_rect(self.render_area):
+                self.previous_positions[obj] = obj.sprite.rect.topleft
+
+    def interpolated_rect(self, obj, alpha):
+        """Return the object's rect placed between its previous and current tick positions."""
+        rect = obj.sprite.rect
+        previous = self.previous_positions.get(obj)
+        if previous is None:
+            return rect
+        return rect.move(round((previous[0] - rect.x) * (1 - alpha)), round((previous[1] - rect.y) * (1 - alpha)))
+
+    def draw(self, screen, alpha=1.0):
+        """
+        Draw the visible part of the map.
+        :param alpha: How far rendering is between the previous and the current simulation tick (0-1).
+        """
         # Get the dimensions of the screen
         screen_width, screen_height = screen.get_size()
 
         # Calculate the viewport (visible area), centered on the player
-        player_x, player_y = self.player.sprite.rect.center
+        camera_rect = self.interpolated_rect(self.player, alpha)
+        player_x, player_y = camera_rect.center
         viewport = pygame.Rect(
             player_x - screen_width // 2,
             player_y - screen_height // 2,
@@ -91,21 +384,24 @@ class Map:
             screen_height
         )
 
-        # Draw only tiles that are within the viewport
-        for tile in self.tiles:
-            if viewport.colliderect(tile.sprite.rect):
-                tile.draw(screen, self.player.sprite.rect)
+        # Everything is queued, then drawn in a few blit calls per layer
+        render_queue = self.render_queue
+        screen_size = (screen_width, screen_height)
 
-        # Draw all doors that are within the viewport
-        for door in self.doors:
-            if viewport.colliderect(door.sprite.rect):
-                door.draw(screen, self.player.sprite.rect)
+        # Draw the floors, walls and closed doors from the chunks within the viewport
+        with profiler.scope("map.draw_static_layer"):
+            self.static_layer.draw(render_queue, viewport)
 
         # Draw all enemies that are within the viewport
-        for enemy in self.enemies:
-            if viewport.colliderect(enemy.sprite.rect):
-                enemy.draw(screen, self.player.sprite.rect)
+        with profiler.scope("map.draw_enemies"):
+            self.render_area = viewport.inflate(self.tile_width * 4, self.tile_height * 4)
+            for obj in self.spatial_hash.query_rect(self.render_area):
+                if isinstance(obj, Enemy):
+                    obj.draw(render_queue, screen_size, camera_rect, self.interpolated_rect(obj, alpha).topleft)
 
         # Draw the player at the center of the screen
-        if self.player:
-            self.player.draw(screen)
+        with profiler.scope("map.draw_player"):
+            if self.player:
+                self.player.draw(render_queue, screen_size)
+
+        render_queue.flush(screen)
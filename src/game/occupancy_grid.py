@@ -0,0 +1,135 @@
+import pygame
+
+
+class OccupancyGrid:
+    # Cell flags
+    WALL = 1
+    DOOR = 2
+    SOLID = WALL | DOOR
+
+    def __init__(self, width, height, tile_width, tile_height):
+        """
+        Compact per-cell flags for the level, used for static collision.
+        :param width: Number of columns in the level.
+        :param height: Number of rows in the level.
+        :param tile_width: Width of a cell in pixels.
+        :param tile_height: Height of a cell in pixels.
+        """
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.cells = bytearray(width * height)
+        self.version = 0  # Bumped whenever a cell changes, so derived data can be invalidated
+        self.line_of_sight_cache = {}  # (start cell, end cell) -> blocked, for the current tick
+
+    def in_bounds(self, col, row):
+        return 0 <= col < self.width and 0 <= row < self.height
+
+    def get(self, col, row):
+        """Return the flags of a cell; cells outside the level are empty."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.cells[row * self.width + col]
+        return 0
+
+    def set_flag(self, col, row, flag):
+        self.cells[row * self.width + col] |= flag
+        self.changed()
+
+    def clear_flag(self, col, row, flag):
+        self.cells[row * self.width + col] &= ~flag
+        self.changed()
+
+    def set_row(self, row, flags, first_col=0):
+        """Overwrite the flags of a row, or of the part of it starting at first_col."""
+        start = row * self.width + first_col
+        self.cells[start:start + len(flags)] = flags
+        self.changed()
+
+    def changed(self):
+        self.version += 1
+        self.line_of_sight_cache.clear()
+
+    def begin_tick(self):
+        """Forget the line of sight results of the previous tick."""
+        self.line_of_sight_cache.clear()
+
+    def is_solid(self, col, row):
+        return self.get(col, row) & OccupancyGrid.SOLID != 0
+
+    def cell_at(self, x, y):
+        """Return the (col, row) containing a pixel position."""
+        return int(x) // self.tile_width, int(y) // self.tile_height
+
+    def cell_rect(self, col, row):
+        return pygame.Rect(col * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height)
+
+    def cell_range(self, rect):
+        return (max(0, rect.left // self.tile_width), max(0, rect.top // self.tile_height),
+                min(self.width - 1, (rect.right - 1) // self.tile_width), min(self.height - 1, (rect.bottom - 1) // self.tile_height))
+
+    def solid_rects(self, rect):
+        """Return the rects of the solid cells overlapping the given rect."""
+        first_col, first_row, last_col, last_row = self.cell_range(rect)
+        rects = []
+        for row in range(first_row, last_row + 1):
+            offset = row * self.width
+            for col in range(first_col, last_col + 1):
+                if self.cells[offset + col] & OccupancyGrid.SOLID:
+                    rects.append(self.cell_rect(col, row))
+        return rects
+
+    def collides(self, rect):
+        """Check whether the given rect overlaps any solid cell."""
+        first_col, first_row, last_col, last_row = self.cell_range(rect)
+        for row in range(first_row, last_row + 1):
+            offset = row * self.width
+            for col in range(first_col, last_col + 1):
+                if self.cells[offset + col] & OccupancyGrid.SOLID:
+                    return True
+        return False
+
+    def line_of_sight_blocked(self, start, end):
+        """
+        Check whether a solid cell lies on the line between two pixel positions.
+        The line is traced between the centers of the cells containing the two points,
+        and results are memoized per (start cell, end cell) pair until the next tick.
+        """
+        key = (self.cell_at(*start), self.cell_at(*end))
+        blocked = self.line_of_sight_cache.get(key)
+        if blocked is None:
+            blocked = self.trace_blocked(*key)
+            self.line_of_sight_cache[key] = blocked
+        return blocked
+
+    def trace_blocked(self, start_cell, end_cell):
+        """Walk the cells crossed by the line between two cell centers (DDA), stopping at the first solid one."""
+        col, row = start_cell
+        end_col, end_row = end_cell
+        dx, dy = abs(end_col - col), abs(end_row - row)
+        step_x = 1 if end_col > col else -1
+        step_y = 1 if end_row > row else -1
+
+        # The line reaches its (i + 1)-th vertical boundary at t = (2i + 1) / 2dx and its (j + 1)-th
+        # horizontal boundary at t = (2j + 1) / 2dy; comparing the cross products keeps this exact.
+        crossed_x = crossed_y = 0
+        while crossed_x < dx or crossed_y < dy:
+            next_x = (2 * crossed_x + 1) * dy
+            next_y = (2 * crossed_y + 1) * dx
+            if crossed_y == dy or (crossed_x < dx and next_x < next_y):
+                col += step_x
+                crossed_x += 1
+            elif crossed_x == dx or next_y < next_x:
+                row += step_y
+                crossed_y += 1
+            else:
+                # The line passes exactly through a corner and touches both side cells
+                if self.is_solid(col + step_x, row) or self.is_solid(col, row + step_y):
+                    return True
+                col += step_x
+                row += step_y
+                crossed_x += 1
+                crossed_y += 1
+            if self.is_solid(col, row):
+                return True
+        return False
@@ -0,0 +1,54 @@
+import time
+
+import pygame
+
+from src.game.game import Game
+from src.game.input_recording import InputRecorder, RecordedKeys, session_state
+
+
+class ReplayRunner:
+    def __init__(self, filename, draw=False):
+        """
+        Re-runs a recorded session tick by tick, as fast as possible, so it can be used as a repeatable benchmark.
+        :param filename: Path of a recording saved by Game(record=...).
+        :param draw: Also draw every tick, to include rendering in the measurement.
+        """
+        self.recording = InputRecorder.load(filename)
+        self.draw = draw
+        config = self.recording["config"]
+        self.tick_rate = config["tick_rate"]
+
+        start = time.perf_counter()
+        self.game = Game(vectorized_enemies=config["vectorized_enemies"], tick_rate=self.tick_rate, map_file=config["map_file"],
+                         stream_radius=config["stream_radius"], ai_lod=config["ai_lod"], seed=config["seed"],
+                         enemy_workers=config.get("enemy_workers", 0))
+        self.load_time = time.perf_counter() - start
+
+    def run(self):
+        """
+        Replay every recorded tick.
+        :return: Dictionary with the tick count, elapsed seconds, ticks per second, speed relative to real time,
+                 and whether the final state matches the recorded one (None if the recording has none).
+        """
+        start = time.perf_counter()
+        for pressed, events in self.recording["ticks"]:
+            for event in events:
+                self.game.handle_event(event)
+            self.game.update(RecordedKeys(pressed))
+            if self.draw:
+                self.game.draw()
+                pygame.display.flip()
+        elapsed = time.perf_counter() - start
+
+        ticks = len(self.recording["ticks"])
+        final_state = session_state(self.game.map)
+        expected_state = self.recording.get("final_state")
+        return {
+            "ticks": ticks,
+            "seconds": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed > 0 else 0.0,
+            "speedup": ticks / self.tick_rate / elapsed if elapsed > 0 else 0.0,
+            "load_seconds": self.load_time,
+            "final_state": final_state,
+            "matches_recording": None if expected_state is None else final_state == expected_state,
+        }
@@ -0,0 +1,255 @@
+import multiprocessing
+import weakref
+from multiprocessing import shared_memory
+
+import pygame
+
+from src.game.enemy_pool import EnemyPool, np
+from src.game.flow_field import FlowField
+from src.game.occupancy_grid import OccupancyGrid
+from src.utilities.profiler import profiler
+
+# Fields the workers read to simulate a region, and the ones they write back through the next_* arrays
+SIMULATED_FIELDS = ("x", "y", "width", "height", "direction_x", "direction_y", "speed", "chase_range",
+                    "state", "patrolling", "casting", "player_collision", "patrol_x", "patrol_y", "delta_time")
+WRITTEN_FIELDS = ("x", "y", "direction_x", "direction_y", "state", "player_collision")
+
+
+def attach_shared_memory(name):
+    """Open an existing shared memory block; only the main process, which created it, unlinks it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always tracks it, in the resource tracker shared with the main process
+        return shared_memory.SharedMemory(name=name)
+
+
+class RegionPool(EnemyPool):
+    def __init__(self, arrays, indices, seed, buckets):
+        """
+        Compact copy of the enemies of one region and its halo, simulated in a worker process.
+        :param arrays: Field name -> shared array of the ShardedEnemyPool.
+        :param indices: Slots of the enemies to copy.
+        :param seed: Seed of the wander random walk for this region and tick.
+        :param buckets: (bucket_start, bucket_count) arrays sized to the map, reused between ticks.
+        """
+        self.enemies = []
+        self.count = self.capacity = len(indices)
+        self.rng = np.random.default_rng(seed)
+        self.bucket_start, self.bucket_count = buckets
+        for name in SIMULATED_FIELDS:
+            setattr(self, name, arrays[name][indices])
+
+    def steer_patrolling(self, patrolling):
+        """Steer towards the patrol targets the main process picked, as there are no Enemy objects here."""
+        indices = np.flatnonzero(patrolling)
+        vector_x, vector_y = self.patrol_x[indices] - self.x[indices], self.patrol_y[indices] - self.y[indices]
+        distance = np.sqrt(vector_x ** 2 + vector_y ** 2)
+        moving = distance != 0
+        self.direction_x[indices[moving]] = vector_x[moving] / distance[moving]
+        self.direction_y[indices[moving]] = vector_y[moving] / distance[moving]
+
+
+# State of a worker process, kept between ticks
+worker_state = {"blocks": {}, "grid": None, "buckets": None}
+
+
+def worker_arrays(layout, capacity):
+    """Map the pool's shared memory blocks into this worker, reusing the ones attached on earlier ticks."""
+    blocks = worker_state["blocks"]
+    names = {name for _, name, _ in layout}
+    for name in [name for name in blocks if name not in names]:
+        blocks.pop(name).close()  # The pool grew and replaced its blocks
+    arrays = {}
+    for field, name, dtype in layout:
+        if name not in blocks:
+            blocks[name] = attach_shared_memory(name)
+        arrays[field] = np.ndarray(capacity, dtype=dtype, buffer=blocks[name].buf)
+    return arrays
+
+
+def worker_grid(grid_name, width, height, tile_width, tile_height):
+    grid = worker_state["grid"]
+    if grid is None or grid.block_name != grid_name:
+        grid = OccupancyGrid(width, height, tile_width, tile_height)
+        grid.block_name = grid_name
+        grid.block = attach_shared_memory(grid_name)
+        grid.cells = grid.block.buf[:width * height]
+        worker_state["grid"] = grid
+        worker_state["buckets"] = (np.zeros(width * height, dtype=np.int32), np.zeros(width * height, dtype=np.int32))
+    return grid
+
+
+def simulate_region(task):
+    """
+    Worker entry point: simulate the enemies whose x lies in [low, high) against their neighbours,
+    and write their new state to the next_* arrays.
+    """
+    (layout, capacity, count, low, high, halo, seed, grid_layout, player_rect, flow) = task
+    arrays = worker_arrays(layout, capacity)
+    grid = worker_grid(*grid_layout)
+
+    x = arrays["x"][:count]
+    own = (x >= low) & (x < high)
+    indices = np.flatnonzero((x >= low - halo) & (x < high + halo))
+    region = RegionPool(arrays, indices, seed, worker_state["buckets"])
+    own_local = own[indices]
+    region.delta_time[~own_local] = 0.0  # Neighbours from other regions only block movement
+
+    flow_field = None
+    if flow is not None:
+        flow_field = FlowField(grid, flow["radius"])
+        flow_field.origin, flow_field.player_cell, flow_field.directions = flow["origin"], flow["player_cell"], flow["directions"]
+
+    region.simulate(region.delta_time, grid, pygame.Rect(player_rect), flow_field)
+
+    written = indices[own_local]
+    for name in WRITTEN_FIELDS:
+        arrays["next_" + name][written] = getattr(region, name)[own_local]
+    return len(written)
+
+
+class ShardedEnemyPool(EnemyPool):
+    FIELDS = dict(EnemyPool.FIELDS, patrol_x=np.float64, patrol_y=np.float64, delta_time=np.float64,
+                  **{"next_" + name: EnemyPool.FIELDS[name] for name in WRITTEN_FIELDS}) if np is not None else {}
+
+    def __init__(self, workers=None, capacity=64, seed=None, min_sharded_enemies=2000):
+        """
+        Enemy pool whose state arrays live in shared memory and whose movement is simulated by a process pool.
+        Every tick the enemies being updated are split into vertical strips holding equal numbers of them; each
+        worker simulates one strip against a halo of neighbours copied from the others. The main process then merges
+        the strips, undoes moves that overlap across strip borders, and keeps abilities, damage and the Enemy objects.
+        :param workers: Number of worker processes; None uses one per CPU core.
+        :param capacity: Initial number of enemy slots.
+        :param seed: Seed of the wander random walk of every strip and tick.
+        :param min_sharded_enemies: Below this many enemies updated in a tick, the pool is simulated in this process.
+        """
+        self.blocks = {}  # Field -> SharedMemory backing its array
+        self.grid_block = None
+        self.grid_version = None
+        self.workers = workers or multiprocessing.cpu_count()
+        super().__init__(capacity, seed)
+        # The workers start after the shared memory exists, so they use the resource tracker the main process started
+        self.process_pool = multiprocessing.Pool(self.workers)
+        # Release the workers and the shared memory when the pool is garbage collected or the program exits
+        self.finalizer = weakref.finalize(self, ShardedEnemyPool.release, self.process_pool, self.blocks)
+        self.seed = int(self.rng.integers(2 ** 32)) if seed is None else seed
+        self.min_sharded_enemies = min_sharded_enemies
+        self.tick = 0
+
+    @staticmethod
+    def release(process_pool, blocks):
+        process_pool.terminate()
+        for block in list(blocks.values()):
+            try:
+                block.close()
+            except BufferError:  # Arrays of a pool that is still referenced (e.g. at exit) keep the mapping alive
+                pass
+            block.unlink()
+        blocks.clear()
+
+    def close(self):
+        self.finalizer()
+
+    def allocate(self, capacity):
+        """Create (or grow) the state arrays in shared memory, keeping the existing slots."""
+        old_blocks = {name: self.blocks[name] for name in self.FIELDS if name in self.blocks}
+        for name, dtype in self.FIELDS.items():
+            block = shared_memory.SharedMemory(create=True, size=max(1, capacity * np.dtype(dtype).itemsize))
+            array = np.ndarray(capacity, dtype=dtype, buffer=block.buf)
+            array[:] = 0
+            if self.count:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+            self.blocks[name] = block
+        self.capacity = capacity
+        for block in old_blocks.values():
+            block.close()
+            block.unlink()
+
+    def layout(self):
+        return tuple((name, block.name, np.dtype(self.FIELDS[name]).str) for name, block in self.blocks.items()
+                     if name in SIMULATED_FIELDS or name.startswith("next_"))
+
+    def add(self, enemy):
+        super().add(enemy)
+        self.patrol_x[self.count - 1], self.patrol_y[self.count - 1] = enemy.sprite.rect.topleft
+
+    def share_grid(self, occupancy_grid):
+        """Copy the occupancy flags to shared memory when they changed (e.g. a door opened)."""
+        size = occupancy_grid.width * occupancy_grid.height
+        if self.grid_block is None:
+            self.grid_block = shared_memory.SharedMemory(create=True, size=max(1, size))
+            self.blocks["grid"] = self.grid_block
+        if occupancy_grid.version != self.grid_version:
+            self.grid_block.buf[:size] = occupancy_grid.cells
+            self.grid_version = occupancy_grid.version
+
+    def update(self, delta_time, occupancy_grid, spatial_hash, player, flow_field=None):
+        n = self.count
+        if n == 0:
+            return
+        delta_time = np.broadcast_to(np.asarray(delta_time, dtype=np.float64), (n,))
+        updating = delta_time > 0
+        if int(updating.sum()) < self.min_sharded_enemies:
+            # Too few enemies to pay for dispatching them to the workers
+            super().update(delta_time, occupancy_grid, spatial_hash, player, flow_field)
+            return
+
+        with profiler.scope("enemy_pool.shard"):
+            self.simulate_sharded(delta_time, updating, occupancy_grid, player.sprite.rect, flow_field)
+        with profiler.scope("enemy_pool.sync_views"):
+            self.sync_views(spatial_hash, player)
+
+    def simulate_sharded(self, delta_time, updating, occupancy_grid, player_rect, flow_field):
+        n = self.count
+        self.tick += 1
+        self.delta_time[:n] = delta_time
+        self.update_patrol_targets(updating)
+        self.share_grid(occupancy_grid)
+
+        # Strip borders at quantiles of the updated enemies' x, so every worker gets the same share of the work
+        updated_x = np.sort(self.x[:n][updating])
+        borders = [float(updated_x[len(updated_x) * k // self.workers]) for k in range(1, self.workers)]
+        lows, highs = [-np.inf] + borders, borders + [np.inf]
+        halo = 2 * occupancy_grid.tile_width  # Enemies are at most a tile wide and move less than a tile per tick
+
+        grid_layout = (self.grid_block.name, occupancy_grid.width, occupancy_grid.height, occupancy_grid.tile_width, occupancy_grid.tile_height)
+        flow = None
+        if flow_field is not None and flow_field.player_cell is not None:
+            flow = {"radius": flow_field.radius, "origin": flow_field.origin, "player_cell": flow_field.player_cell, "directions": bytes(flow_field.directions)}
+        layout = self.layout()
+        tasks = [(layout, self.capacity, n, low, high, halo, (self.seed, self.tick, region), grid_layout, tuple(player_rect), flow)
+                 for region, (low, high) in enumerate(zip(lows, highs))]
+
+        previous_x, previous_y = self.x[:n].copy(), self.y[:n].copy()
+        self.process_pool.map(simulate_region, tasks)
+        for name in WRITTEN_FIELDS:
+            getattr(self, name)[:n] = getattr(self, "next_" + name)[:n]
+        self.reconcile_borders(borders, halo, previous_x, previous_y, occupancy_grid)
+
+    def update_patrol_targets(self, updating):
+        """Advance patrol routes on the main process, where the routes are, and share each enemy's current target."""
+        for i in np.flatnonzero(updating & self.patrolling[:self.count]).tolist():
+            enemy = self.enemies[i]
+            target_x, target_y = enemy.patrol_points[enemy.patrol_index]
+            if abs(target_x - self.x[i]) < 5 and abs(target_y - self.y[i]) < 5:
+                enemy.patrol_index = (enemy.patrol_index + 1) % len(enemy.patrol_points)
+            self.patrol_x[i], self.patrol_y[i] = enemy.patrol_points[enemy.patrol_index]
+
+    def reconcile_borders(self, borders, halo, previous_x, previous_y, occupancy_grid):
+        """Put back enemies near strip borders that moved into an enemy simulated by another worker."""
+        if not borders:
+            return
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        near_border = np.zeros(n, dtype=np.bool_)
+        for border in borders:
+            near_border |= np.abs(x - border) < halo
+        band = np.flatnonzero(near_border)
+        if band.size < 2:
+            return
+        left, top = np.rint(x[band]).astype(np.int64), np.rint(y[band]).astype(np.int64)
+        overlapping = self.hits_other_enemies(left, top, left, top, self.width[band], self.height[band], occupancy_grid)
+        moved = (x[band] != previous_x[band]) | (y[band] != previous_y[band])
+        reverted = band[overlapping & moved]
+        x[reverted], y[reverted] = previous_x[reverted], previous_y[reverted]
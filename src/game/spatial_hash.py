@@ -0,0 +1,114 @@
+class SpatialHash:
+    def __init__(self, cell_size=100, bounds=None):
+        """
+        Uniform grid index over objects that expose a sprite.rect.
+        :param cell_size: Size of a hash cell in pixels; roughly twice the typical object size works well.
+        :param bounds: (width, height) of the indexed area in pixels; cell ranges are clamped to it, so queries
+                       larger than the area do not visit cells that can never hold anything. None for unbounded.
+        """
+        self.cell_size = cell_size
+        self.last_cell = None  # (last cell_x, last cell_y) within the bounds
+        if bounds is not None:
+            self.last_cell = (max(bounds[0] - 1, 0) // cell_size, max(bounds[1] - 1, 0) // cell_size)
+        self.cells = {}  # (cell_x, cell_y) -> dict used as an insertion-ordered set of objects
+        self.object_cells = {}  # object -> (first_x, first_y, last_x, last_y) cell range it is stored in
+
+    def clamp_range(self, first_x, first_y, last_x, last_y):
+        """Clamp a cell range to the bounds; objects outside them are stored in the border cells."""
+        if self.last_cell is None:
+            return first_x, first_y, last_x, last_y
+        max_x, max_y = self.last_cell
+        if first_x >= 0 and first_y >= 0 and last_x <= max_x and last_y <= max_y:
+            return first_x, first_y, last_x, last_y
+        return (min(max(first_x, 0), max_x), min(max(first_y, 0), max_y),
+                min(max(last_x, 0), max_x), min(max(last_y, 0), max_y))
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return self.clamp_range(rect.left // size, rect.top // size, (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def radius_range(self, center, radius):
+        """Return the clamped cell range covering a circle."""
+        size = self.cell_size
+        cx, cy = center
+        return self.clamp_range(int(cx - radius) // size, int(cy - radius) // size,
+                                int(cx + radius) // size, int(cy + radius) // size)
+
+    @staticmethod
+    def range_cells(first_x, first_y, last_x, last_y):
+        """Number of cells in a cell range."""
+        return (last_x - first_x + 1) * (last_y - first_y + 1)
+
+    def insert(self, obj):
+        cell_range = self.cell_range(obj.sprite.rect)
+        self.object_cells[obj] = cell_range
+        first_x, first_y, last_x, last_y = cell_range
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                self.cells.setdefault((cell_x, cell_y), {})[obj] = None
+
+    def remove(self, obj):
+        cell_range = self.object_cells.pop(obj, None)
+        if cell_range is None:
+            return
+        first_x, first_y, last_x, last_y = cell_range
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.pop(obj, None)
+                    if not bucket:
+                        del self.cells[(cell_x, cell_y)]
+
+    def update(self, obj):
+        """Re-index an object after its rect moved; cheap when it stays within the same cells."""
+        if self.object_cells.get(obj) != self.cell_range(obj.sprite.rect):
+            self.remove(obj)
+            self.insert(obj)
+
+    def candidates(self, first_x, first_y, last_x, last_y):
+        found = {}
+        if len(self.cells) < self.range_cells(first_x, first_y, last_x, last_y):
+            # Fewer occupied cells than cells in the range: filter the occupied ones instead of probing every cell
+            for (cell_x, cell_y), bucket in self.cells.items():
+                if first_x <= cell_x <= last_x and first_y <= cell_y <= last_y:
+                    found.update(bucket)
+            return found
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def query_rect(self, rect, exclude=None):
+        """Return the objects whose rect overlaps the given rect."""
+        return [obj for obj in self.candidates(*self.cell_range(rect))
+                if obj is not exclude and rect.colliderect(obj.sprite.rect)]
+
+    def query_point(self, point):
+        """Return the objects whose rect contains the given point."""
+        size = self.cell_size
+        cell_x, cell_y = int(point[0]) // size, int(point[1]) // size
+        bucket = self.cells.get(self.clamp_range(cell_x, cell_y, cell_x, cell_y)[:2], {})
+        return [obj for obj in bucket if obj.sprite.rect.collidepoint(point)]
+
+    def query_radius(self, center, radius, exclude=None):
+        """Return the objects whose rect center lies within radius of the given point."""
+        cx, cy = center
+        candidates = self.candidates(*self.radius_range(center, radius))
+        radius_squared = radius * radius
+        found = []
+        for obj in candidates:
+            if obj is exclude:
+                continue
+            ox, oy = obj.sprite.rect.center
+            if (ox - cx) ** 2 + (oy - cy) ** 2 <= radius_squared:
+                found.append(obj)
+        return found
+
+    def __contains__(self, obj):
+        return obj in self.object_cells
+
+    def __len__(self):
+        return len(self.object_cells)
@@ -0,0 +1,92 @@
+import pygame
+
+from src.utilities.render_queue import RenderQueue
+
+
+class StaticLayer:
+    def __init__(self, tile_width, tile_height, chunk_size=16, tile_grid=None):
+        """
+        Renders tiles that never move (floors, walls, closed doors) from pre-baked chunk surfaces.
+        :param tile_width: Width of a single tile in pixels.
+        :param tile_height: Height of a single tile in pixels.
+        :param chunk_size: Number of tiles along each side of a chunk.
+        :param tile_grid: Optional TileGrid whose floors and walls are drawn under the chunk's objects.
+        """
+        self.tile_grid = tile_grid
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.chunk_size = chunk_size
+        self.chunk_width = tile_width * chunk_size
+        self.chunk_height = tile_height * chunk_size
+        self.chunks = {}  # (chunk_col, chunk_row) -> list of tile objects (e.g. doors), in draw order
+        self.surfaces = {}  # (chunk_col, chunk_row) -> baked surface
+        self.dirty = set()  # Chunks whose contents changed since they were baked
+
+    def chunk_key(self, rect):
+        return rect.x // self.chunk_width, rect.y // self.chunk_height
+
+    def add(self, tile):
+        key = self.chunk_key(tile.sprite.rect)
+        self.chunks.setdefault(key, []).append(tile)
+        self.dirty.add(key)
+
+    def remove(self, tile):
+        key = self.chunk_key(tile.sprite.rect)
+        tiles = self.chunks.get(key)
+        if tiles and tile in tiles:
+            tiles.remove(tile)
+            self.dirty.add(key)
+
+    def load(self, key):
+        """Start drawing a chunk, even if it has no tile objects."""
+        self.chunks.setdefault(key, [])
+        self.dirty.add(key)
+
+    def unload(self, key):
+        """Forget a chunk's tiles and its baked surface."""
+        self.chunks.pop(key, None)
+        self.surfaces.pop(key, None)
+        self.dirty.discard(key)
+
+    @staticmethod
+    def tile_image(tile):
+        """Return the surface a tile would draw, or None if it has nothing loaded."""
+        return tile.sprite.image
+
+    def bake(self, key):
+        """Draw every tile of a chunk onto its own surface."""
+        surface = pygame.Surface((self.chunk_width, self.chunk_height))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill((0, 0, 0))
+
+        origin_x, origin_y = key[0] * self.chunk_width, key[1] * self.chunk_height
+        if self.tile_grid is not None:
+            self.tile_grid.draw_area(surface, key[0] * self.chunk_size, key[1] * self.chunk_size, self.chunk_size, self.chunk_size, (origin_x, origin_y))
+        for tile in self.chunks.get(key, ()):
+            rect = tile.sprite.rect
+            position = (rect.x - origin_x, rect.y - origin_y)
+            image = self.tile_image(tile)
+            if image:
+                surface.blit(image, position)
+            else:
+                pygame.draw.rect(surface, (255, 0, 0), (position[0], position[1], rect.width, rect.height))
+
+        self.surfaces[key] = surface
+        self.dirty.discard(key)
+
+    def draw(self, render_queue, viewport):
+        """Queue the chunks overlapping the viewport, baking any that are new or out of date."""
+        first_col = viewport.left // self.chunk_width
+        last_col = (viewport.right - 1) // self.chunk_width
+        first_row = viewport.top // self.chunk_height
+        last_row = (viewport.bottom - 1) // self.chunk_height
+
+        for chunk_row in range(first_row, last_row + 1):
+            for chunk_col in range(first_col, last_col + 1):
+                key = (chunk_col, chunk_row)
+                if key not in self.chunks:
+                    continue
+                if key in self.dirty or key not in self.surfaces:
+                    self.bake(key)
+                render_queue.submit(self.surfaces[key], (chunk_col * self.chunk_width - viewport.x, chunk_row * self.chunk_height - viewport.y), RenderQueue.BACKGROUND)
@@ -0,0 +1,96 @@
+import pygame
+
+from src.utilities.file_manager import FileManager
+
+
+class TileGrid:
+    # Tile kinds
+    NONE, FLOOR, WALL_X, WALL_Y = 0, 1, 2, 3
+
+    # Shared tileset of each kind: (image, rows, cols)
+    TILESETS = {
+        FLOOR: ("stone_floor.png", 4, 4),
+        WALL_X: ("stone_walls_x.png", 2, 7),
+        WALL_Y: ("stone_walls_y.png", 2, 2),
+    }
+
+    # Kind drawn for each level tile code, as a bytes.translate table: the player, enemy and door cells have floor under them
+    KIND_OF_CODE = bytearray(256)
+    KIND_OF_CODE[0] = KIND_OF_CODE[1] = KIND_OF_CODE[4] = KIND_OF_CODE[5] = FLOOR
+    KIND_OF_CODE[2] = WALL_X
+    KIND_OF_CODE[3] = WALL_Y
+    KIND_OF_CODE = bytes(KIND_OF_CODE)
+
+    def __init__(self, width, height, tile_width, tile_height, variants=None):
+        """
+        Flyweight storage of the level's floors and walls: one byte per cell and one tileset per kind.
+        :param width: Number of columns in the level.
+        :param height: Number of rows in the level.
+        :param tile_width: Width of a cell in pixels.
+        :param tile_height: Height of a cell in pixels.
+        :param variants: Optional row-major variant per cell; 255 (or None for the whole level) derives it from the coordinates.
+        """
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.kinds = bytearray(width * height)
+        self.variants = variants
+        self.tilesets = {}  # Kind -> list of tile frames, loaded on first use
+
+    def set_row(self, row, codes, first_col=0):
+        """Set the kinds of a row, or of the part of it starting at first_col, from its level tile codes."""
+        start = row * self.width + first_col
+        self.kinds[start:start + len(codes)] = bytes(codes).translate(TileGrid.KIND_OF_CODE)
+
+    def kind(self, col, row):
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.kinds[row * self.width + col]
+        return TileGrid.NONE
+
+    def tileset(self, kind):
+        tiles = self.tilesets.get(kind)
+        if tiles is None:
+            image, rows, cols = TileGrid.TILESETS[kind]
+            tiles = FileManager.load_tiles(image, rows, cols)
+            self.tilesets[kind] = tiles
+        return tiles
+
+    @staticmethod
+    def coordinate_hash(col, row):
+        """Deterministic, well mixed 32-bit hash of a cell, so variants can be recomputed instead of stored."""
+        h = ((col * 73856093) ^ (row * 19349663)) & 0xFFFFFFFF
+        h = ((h ^ (h >> 13)) * 0x5BD1E995) & 0xFFFFFFFF
+        return h ^ (h >> 15)
+
+    def variant(self, col, row, count):
+        """Return the index of the tile frame drawn at a cell, out of count frames."""
+        if self.variants is not None:
+            variant = self.variants[row * self.width + col]
+            if variant < count:
+                return variant
+        return TileGrid.coordinate_hash(col, row) % count
+
+    def draw_area(self, surface, first_col, first_row, cols, rows, origin):
+        """
+        Draw the floors and walls of a block of cells.
+        :param surface: Surface to draw on.
+        :param first_col: First column of the block.
+        :param first_row: First row of the block.
+        :param cols: Number of columns in the block.
+        :param rows: Number of rows in the block.
+        :param origin: Pixel position in the level of the surface's top left corner.
+        """
+        tile_width, tile_height = self.tile_width, self.tile_height
+        for row in range(max(0, first_row), min(self.height, first_row + rows)):
+            y = row * tile_height - origin[1]
+            for col in range(max(0, first_col), min(self.width, first_col + cols)):
+                kind = self.kinds[row * self.width + col]
+                if kind == TileGrid.NONE:
+                    continue
+                x = col * tile_width - origin[0]
+                tiles = self.tileset(kind)
+                if tiles:
+                    surface.blit(tiles[self.variant(col, row, len(tiles))], (x, y))
+                else:
+                    pygame.draw.rect(surface, (255, 0, 0), (x, y, tile_width, tile_height))
@@ -1,5 +1,58 @@
-from game.game import Game
+import argparse
+import os
+
+from src.utilities.startup_profiler import startup_profiler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PygameCrawler2")
+    parser.add_argument("--headless", action="store_true", help="Run the simulation without a window and report ticks per second")
+    parser.add_argument("--ticks", type=int, help="Headless: number of ticks to simulate")
+    parser.add_argument("--duration", type=float, default=10.0, help="Headless: seconds to simulate when --ticks is not given")
+    parser.add_argument("--tick-rate", type=int, default=60, help="Simulation ticks per second")
+    parser.add_argument("--vectorized-enemies", action="store_true", help="Update enemies with the NumPy enemy pool")
+    parser.add_argument("--enemy-workers", type=int, default=0, help="Simulate enemy movement in this many worker processes (0: in the main process)")
+    parser.add_argument("--stream-radius", type=int, default=2, help="Chunks around the player to keep instantiated; -1 loads the whole map")
+    parser.add_argument("--no-ai-lod", action="store_true", help="Update every enemy every tick instead of by distance to the player")
+    parser.add_argument("--seed", type=int, help="Seed of the simulation's random number generator")
+    parser.add_argument("--record", metavar="FILE", help="Save the input of every tick to FILE on quit, for --replay")
+    parser.add_argument("--replay", metavar="FILE", help="Re-run a recorded session as fast as possible and report its speed")
+    parser.add_argument("--replay-draw", action="store_true", help="Replay: also draw every tick (in a window)")
+    parser.add_argument("--profile", action="store_true", help="Enable the frame profiler (F3: overlay, F4: export trace)")
+    parser.add_argument("--profile-startup", action="store_true", help="Print how long imports and each startup phase took until the first frame")
+    parser.add_argument("--verbose", action="store_true", help="Log every file loaded and other informational messages")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    args = parse_args()
+    startup_profiler.set_enabled(args.profile_startup)
+    with startup_profiler.phase("import pygame"):
+        import pygame  # Imported first to time it apart from the game's own modules, as it dominates import time
+    from src.utilities.log import log
+
+    log.set_verbose(args.verbose)
+    stream_radius = None if args.stream_radius < 0 else args.stream_radius
+    if args.replay:
+        if not args.replay_draw:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        from game.replay import ReplayRunner
+
+        result = ReplayRunner(args.replay, draw=args.replay_draw).run()
+        print(f"Replayed {result['ticks']} ticks in {result['seconds']:.2f}s ({result['ticks_per_second']:.1f} ticks/s, "
+              f"{result['speedup']:.1f}x real time); final state matches recording: {result['matches_recording']}")
+    elif args.headless:
+        with startup_profiler.phase("import game modules"):
+            from game.headless import HeadlessRunner
+
+        runner = HeadlessRunner(tick_rate=args.tick_rate, vectorized_enemies=args.vectorized_enemies, stream_radius=stream_radius, ai_lod=not args.no_ai_lod, seed=args.seed,
+                                enemy_workers=args.enemy_workers)
+        result = runner.run(ticks=args.ticks, duration=None if args.ticks else args.duration)
+        print(f"Simulated {result['ticks']} ticks in {result['seconds']:.2f}s ({result['ticks_per_second']:.1f} ticks/s)")
+    else:
+        with startup_profiler.phase("import game modules"):
+            from game.game import Game
+
+        game = Game(tick_rate=args.tick_rate, vectorized_enemies=args.vectorized_enemies, profile=args.profile, stream_radius=stream_radius,
+                    ai_lod=not args.no_ai_lod, seed=args.seed, record=args.record, enemy_workers=args.enemy_workers)
+        game.run()
@@ -5,13 +5,14 @@ import pygame
 from src.menus.character_menu_equipment import CharacterMenuEquipment
 from src.menus.character_menu_inventory import CharacterMenuInventory
 from src.menus.character_menu_quests import CharacterMenuQuests
+from src.utilities.text_renderer import text_renderer
 
 
 class CharacterMenu:
     def __init__(self, screen_width, screen_height, item_catalog):
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.font = pygame.font.Font(None, 36)  # Default font for main text
+        self.font_size = 36  # Default font size for main text
         self.menu_open = False
         self.selected_tab = "Quests"  # Start with the quests tab selected
         self.tabs = ["Quests", "Inventory", "Equipment"]
@@ -21,13 +22,43 @@ class CharacterMenu:
         self.quests = CharacterMenuQuests()
         self.equipment = CharacterMenuEquipment(item_catalog)
 
+        # The menu is drawn once into a cached surface and rebuilt only when what it shows changes
+        menu_width, menu_height = self.screen_width * 0.75, self.screen_height * 0.75
+        menu_x, menu_y = (self.screen_width - menu_width) // 2, (self.screen_height - menu_height) // 2
+        self.menu_rect = pygame.Rect(menu_x, menu_y, menu_width, menu_height)
+        self.menu_surface = None
+        self.menu_key = None
+
     def update(self, player):
         self.equipment.update_equipment(player)
 
+    def cache_key(self, player):
+        """Return everything the menu's pixels depend on."""
+        return (
+            self.selected_tab,
+            self.character_menu_inventory.selected_sub_tab,
+            self.character_menu_inventory.selected_item_index,
+            tuple(player.inventory.get_items()),
+            tuple(player.equipped.get_equipped_items().items()),
+            tuple((slot, id(sprite.image)) for slot, sprite in self.equipment.sprites.items()),
+        )
+
     def draw(self, screen, player):
+        key = self.cache_key(player)
+        if self.menu_surface is None or key != self.menu_key:
+            if self.menu_surface is None:
+                self.menu_surface = pygame.Surface(self.menu_rect.size)
+                if pygame.display.get_surface() is not None:
+                    self.menu_surface = self.menu_surface.convert()
+            self.build(self.menu_surface, player)
+            self.menu_key = key
+        screen.blit(self.menu_surface, self.menu_rect)
+
+    def build(self, screen, player):
+        """Draw the whole menu onto its cached surface, whose top left corner is the menu's."""
         # Draw the background of the character menu
-        menu_width, menu_height = self.screen_width * 0.75, self.screen_height * 0.75
-        menu_x, menu_y = (self.screen_width - menu_width) // 2, (self.screen_height - menu_height) // 2
+        menu_width, menu_height = self.menu_rect.size
+        menu_x, menu_y = 0, 0
         menu_rect = pygame.Rect(menu_x, menu_y, menu_width, menu_height)
         pygame.draw.rect(screen, (30, 30, 30), menu_rect)
         pygame.draw.rect(screen, (255, 255, 255), menu_rect, 3)
@@ -44,7 +75,7 @@ class CharacterMenu:
             pygame.draw.rect(screen, (200, 200, 200), tab_rect, 2)
 
             # Draw the tab text
-            tab_text = self.font.render(tab, True, (255, 255, 255))
+            tab_text = text_renderer.render(tab, self.font_size, (255, 255, 255))
             text_x = tab_x + (tab_width - tab_text.get_width()) // 2
             text_y = tab_y + (tab_height - tab_text.get_height()) // 2
             screen.blit(tab_text, (text_x, text_y))
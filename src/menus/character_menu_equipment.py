@@ -1,9 +1,10 @@
 import pygame  # Assuming sprite.py is in the same directory or accessible path
 from src.entities.sprite import StaticSprite
+from src.utilities.text_renderer import text_renderer
 
 class CharacterMenuEquipment:
     def __init__(self, item_catalog):
-        self.font = pygame.font.Font(None, 36)
+        self.font_size = 36
         self.item_catalog = item_catalog
         self.sprites = {}  # Store StaticSprite instances for equipped items
         self.player_sprite = None  # Store StaticSprite instance for the player
@@ -59,6 +60,6 @@ class CharacterMenuEquipment:
         equipped_items = player.equipped.get_equipped_items()
         for i, (slot, item_id) in enumerate(equipped_items.items()):
             item_name = "None" if item_id == 0 else self.item_catalog.get_item_by_id(item_id).name
-            equipment_text = self.font.render(f"{slot.capitalize()}: {item_name}", True, (255, 255, 255))
+            equipment_text = text_renderer.render(f"{slot.capitalize()}: {item_name}", self.font_size, (255, 255, 255))
             text_x, text_y = x + 150, y + (30 * i)  # Position text relative to slot order
             screen.blit(equipment_text, (text_x, text_y))
@@ -2,12 +2,14 @@
 
 import pygame
 
+from src.utilities.text_renderer import text_renderer
+
 
 class CharacterMenuInventory:
     def __init__(self, screen_width, item_catalog):
         self.screen_width = screen_width
         self.item_catalog = item_catalog  # Reference to the ItemCatalog
-        self.sub_menu_font = pygame.font.Font(None, 28)  # Smaller font for sub-tabs
+        self.sub_menu_font_size = 28  # Smaller font for sub-tabs
         self.sub_tabs = ["All", "Weapons", "Armor", "Consumable", "Valuables"]
         self.selected_sub_tab = "All"  # Start with "All" items selected
         self.selected_item_index = 0
@@ -58,7 +60,7 @@ class CharacterMenuInventory:
             pygame.draw.rect(screen, (200, 200, 200), sub_tab_rect, 2)
 
             # Draw the sub-tab text
-            sub_tab_text = self.sub_menu_font.render(sub_tab, True, (255, 255, 255))
+            sub_tab_text = text_renderer.render(sub_tab, self.sub_menu_font_size, (255, 255, 255))
             text_x = sub_tab_x + (sub_tab_width - sub_tab_text.get_width()) // 2
             text_y = sub_tab_y + (sub_tab_height - sub_tab_text.get_height()) // 2
             screen.blit(sub_tab_text, (text_x, text_y))
@@ -70,7 +72,7 @@ class CharacterMenuInventory:
         item_ids = player.inventory.get_items()
 
         if not item_ids:
-            inventory_text = self.sub_menu_font.render("Inventory is empty", True, (255, 255, 255))
+            inventory_text = text_renderer.render("Inventory is empty", self.sub_menu_font_size, (255, 255, 255))
             screen.blit(inventory_text, (x, item_y))
         else:
             # Display full item details using the item catalog filtered by sub-tab
@@ -87,14 +89,11 @@ class CharacterMenuInventory:
                         filtered_items.append(item)
 
             if not filtered_items:
-                inventory_text = self.sub_menu_font.render(f"No items found for '{self.selected_sub_tab}'", True, (255, 255, 255))
+                inventory_text = text_renderer.render(f"No items found for '{self.selected_sub_tab}'", self.sub_menu_font_size, (255, 255, 255))
                 screen.blit(inventory_text, (x, item_y))
-            else:
-                for i, item in enumerate(filtered_items):
-                    item_text = self.sub_menu_font.render(f"{i + 1}. {item.name} - {item.type} (Value: {item.value} gold)", True, (255, 255, 255))
-                    screen.blit(item_text, (x, item_y + i * 30))
 
+            # Highlight the selected item
             for i, item in enumerate(filtered_items):
                 color = (255, 255, 0) if i == self.selected_item_index else (255, 255, 255)
-                item_text = self.sub_menu_font.render(f"{i + 1}. {item.name} - {item.type} (Value: {item.value} gold)", True, color)
+                item_text = text_renderer.render(f"{i + 1}. {item.name} - {item.type} (Value: {item.value} gold)", self.sub_menu_font_size, color)
                 screen.blit(item_text, (x, item_y + i * 30))
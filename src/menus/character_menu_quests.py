@@ -2,13 +2,15 @@
 
 import pygame
 
+from src.utilities.text_renderer import text_renderer
+
 class CharacterMenuQuests:
     def __init__(self):
-        self.font = pygame.font.Font(None, 36)
+        self.font_size = 36
 
     def draw(self, screen, x, y):
         # Example quests for display
         quests = ["Find the lost sword", "Talk to the village elder", "Collect 5 herbs"]
         for i, quest in enumerate(quests):
-            quest_text = self.font.render(f"{i+1}. {quest}", True, (255, 255, 255))
+            quest_text = text_renderer.render(f"{i+1}. {quest}", self.font_size, (255, 255, 255))
             screen.blit(quest_text, (x, y + i * 30))
@@ -0,0 +1,32 @@
+# loading_screen.py
+
+import pygame
+
+
+class LoadingScreen:
+    def __init__(self, screen):
+        """
+        Progress bar shown while assets and the level load.
+        It keeps its own font rather than the shared text_renderer, which the world may be using on a loader thread.
+        :param screen: The display surface.
+        """
+        self.screen = screen
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.font = pygame.font.Font(None, 36)
+        width, height = screen.get_size()
+        self.bar_rect = pygame.Rect(width // 4, height // 2, width // 2, 24)
+
+    def draw(self, stage, progress):
+        """
+        :param stage: Text describing what is being loaded.
+        :param progress: Fraction of the loading that is done, between 0 and 1.
+        """
+        self.screen.fill((0, 0, 0))
+        text = self.font.render(stage, True, (255, 255, 255))
+        self.screen.blit(text, (self.bar_rect.x, self.bar_rect.y - 40))
+        pygame.draw.rect(self.screen, (60, 60, 60), self.bar_rect)
+        filled = self.bar_rect.copy()
+        filled.width = int(self.bar_rect.width * min(max(progress, 0.0), 1.0))
+        pygame.draw.rect(self.screen, (200, 170, 60), filled)
+        pygame.draw.rect(self.screen, (255, 255, 255), self.bar_rect, 2)
@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.utilities.file_manager import FileManager
+
+
+class AssetLoader:
+    def __init__(self, max_workers=4):
+        """
+        Loads assets on a pool of worker threads while the main thread keeps the window responsive.
+        Workers only decode and parse; surfaces are converted for the display on the main thread, in finalize.
+        :param max_workers: Number of loader threads.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-loader")
+        self.pending = {}  # Future -> (kind, name)
+        self.decoded = []  # (filename, surface) decoded but not yet converted
+        self.results = {}  # Name -> result of a task submitted with submit
+        self.total = 0
+        self.finished = 0
+
+    def load_images(self, filenames):
+        """Decode images from the image directory; they reach FileManager.image_cache in finalize."""
+        for filename in filenames:
+            self.add(self.executor.submit(FileManager.decode_image, filename), "image", filename)
+
+    def load_json(self, filenames):
+        """Parse JSON files from the data directory; the next FileManager.load_json_file of each gets the result."""
+        for filename in filenames:
+            self.add(self.executor.submit(FileManager.read_json_file, filename), "json", filename)
+
+    def submit(self, name, fn, *args):
+        """Run fn(*args) on a loader thread; its result is kept in results[name]."""
+        self.add(self.executor.submit(fn, *args), "task", name)
+
+    def add(self, future, kind, name):
+        self.pending[future] = (kind, name)
+        self.total += 1
+
+    def wait(self, timeout):
+        """Block until a task finishes or the timeout (in seconds) passes."""
+        if self.pending:
+            wait(list(self.pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+    def finalize(self, budget=0.008):
+        """
+        Collect finished tasks and convert decoded images, stopping after budget seconds so a frame can be drawn.
+        Must be called from the main thread. Exceptions raised by submitted tasks are re-raised here.
+        """
+        start = time.perf_counter()
+        for future in [future for future in self.pending if future.done()]:
+            kind, name = self.pending.pop(future)
+            result = future.result()
+            if kind == "image":
+                self.decoded.append((name, result))
+                continue
+            if kind == "json":
+                if result is not None:
+                    FileManager.preloaded_json[name] = result
+            else:
+                self.results[name] = result
+            self.finished += 1
+
+        while self.decoded and time.perf_counter() - start < budget:
+            filename, image = self.decoded.pop()
+            FileManager.finish_image(filename, image)
+            self.finished += 1
+
+    def done(self):
+        return not self.pending and not self.decoded
+
+    def progress(self):
+        """Fraction of the submitted work that is finished, between 0 and 1."""
+        return self.finished / self.total if self.total else 1.0
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+# Colors tried, in order, as the color key of the colorkey atlas; one no sprite uses is picked
+COLORKEY_CANDIDATES = ((255, 0, 255), (0, 255, 255), (255, 255, 0), (1, 254, 1), (254, 1, 254))
+# Names of the atlas pages the pipeline writes
+PAGE_NAME = re.compile(r"(opaque|colorkey|alpha)_[0-9]+\.png")
+
+
+def classify_image(task):
+    """
+    Worker entry point: decide the surface format an image needs.
+    :param task: (path, opaque_alpha); pixels with alpha >= opaque_alpha count as opaque, and
+                 pixels with alpha <= 255 - opaque_alpha as fully transparent.
+    :return: Dictionary with the image's size, format ("opaque", "colorkey" or "alpha"),
+             the candidate color keys it does not use, and the size and modification time of the file.
+    """
+    path, opaque_alpha = task
+    image = pygame.image.load(path)
+    width, height = image.get_size()
+    pixels = width * height
+    stat = os.stat(path)
+    info = {"name": os.path.basename(path), "size": [width, height], "free_colorkeys": [],
+            "file_size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if not image.get_flags() & pygame.SRCALPHA and image.get_colorkey() is None:
+        info["format"] = "opaque"
+        return info
+
+    opaque = pygame.mask.from_surface(image, opaque_alpha - 1).count()
+    visible_mask = pygame.mask.from_surface(image, 255 - opaque_alpha)
+    if opaque == pixels:
+        info["format"] = "opaque"
+    elif opaque == visible_mask.count():
+        # Every pixel is either opaque or transparent, so a color key can stand in for the alpha channel
+        info["format"] = "colorkey"
+        rgb = opaque_copy(image)
+        for key in COLORKEY_CANDIDATES:
+            if pygame.mask.from_threshold(rgb, key, (1, 1, 1, 255)).overlap_area(visible_mask, (0, 0)) == 0:
+                info["free_colorkeys"].append(list(key))
+    else:
+        info["format"] = "alpha"
+    return info
+
+
+def opaque_copy(image):
+    """Return the image's color channels on a surface without alpha, ignoring how transparent each pixel is."""
+    return pygame.image.frombytes(pygame.image.tobytes(image, "RGB"), image.get_size(), "RGB")
+
+
+def compose_page(task):
+    """
+    Worker entry point: draw the images of an atlas page and save it as a PNG.
+    :param task: (path of the page, format, color key or None, [(source path, x, y)], page size, opaque_alpha)
+    """
+    path, surface_format, colorkey, placements, size, opaque_alpha = task
+    if surface_format == "alpha":
+        page = pygame.Surface(size, pygame.SRCALPHA)
+        page.fill((0, 0, 0, 0))
+    else:
+        page = pygame.Surface(size)
+        page.fill(colorkey if colorkey is not None else (0, 0, 0))
+
+    for source, x, y in placements:
+        image = pygame.image.load(source)
+        if surface_format == "alpha":
+            # Adding to the cleared page copies the pixels as they are, instead of blending them over black
+            page.blit(image, (x, y), special_flags=pygame.BLEND_RGBA_ADD)
+            continue
+        rgb = opaque_copy(image)
+        if surface_format == "colorkey":
+            # Transparent pixels take the key color
+            pygame.mask.from_surface(image, 255 - opaque_alpha).to_surface(rgb, setcolor=None, unsetcolor=colorkey)
+        page.blit(rgb, (x, y))
+    pygame.image.save(page, path)
+    return path
+
+
+def pack(infos, page_size, padding=1):
+    """
+    Place images on pages with a shelf packer: the tallest images first, left to right in rows.
+    An image larger than a page gets a page of its own.
+    :return: List of pages, each a dictionary with its size and [(info, x, y)].
+    """
+    pages = []
+    page = None
+    shelf_x = shelf_y = shelf_height = 0
+    for info in sorted(infos, key=lambda info: (-info["size"][1], -info["size"][0], info["name"])):
+        width, height = info["size"]
+        if width + padding > page_size or height + padding > page_size:
+            pages.append({"size": [width, height], "placements": [(info, 0, 0)]})
+            continue
+        if page is not None and shelf_x + width + padding > page_size:
+            # Start a new shelf below the current one
+            shelf_x, shelf_y, shelf_height = 0, shelf_y + shelf_height, 0
+        if page is None or shelf_y + height + padding > page_size:
+            page = {"size": [0, 0], "placements": []}
+            pages.append(page)
+            shelf_x = shelf_y = shelf_height = 0
+        page["placements"].append((info, shelf_x, shelf_y))
+        page["size"] = [max(page["size"][0], shelf_x + width), max(page["size"][1], shelf_y + height)]
+        shelf_x += width + padding
+        shelf_height = max(shelf_height, height + padding)
+    return pages
+
+
+def build(source_dir, output_dir, page_size=2048, opaque_alpha=224, workers=None):
+    """
+    Pack the PNGs of source_dir into atlases grouped by the surface format they need, and write a manifest.
+    Images are classified and pages composed in a process pool.
+    :param source_dir: Directory of the source images.
+    :param output_dir: Directory to write the atlases and manifest.json to.
+    :param page_size: Largest width and height of an atlas page.
+    :param opaque_alpha: Alpha at or above which a pixel counts as opaque.
+    :param workers: Number of worker processes; None uses one per CPU core.
+    :return: The manifest.
+    """
+    if os.path.abspath(output_dir) == os.path.abspath(source_dir):
+        raise ValueError("The atlases need a directory of their own, as earlier pages are removed from it")
+    os.makedirs(output_dir, exist_ok=True)
+    names = sorted(name for name in os.listdir(source_dir) if name.lower().endswith(".png"))
+    atlas_dir = os.path.relpath(output_dir, source_dir).replace(os.sep, "/")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        infos = list(executor.map(classify_image, [(os.path.join(source_dir, name), opaque_alpha) for name in names]))
+
+        # A single key has to suit every image of the colorkey atlas; images that share none of them use alpha
+        colorkey = None
+        keyed = [info for info in infos if info["format"] == "colorkey"]
+        if keyed:
+            common = [key for key in COLORKEY_CANDIDATES if all(list(key) in info["free_colorkeys"] for info in keyed)]
+            if common:
+                colorkey = list(common[0])
+            else:
+                for info in keyed:
+                    info["format"] = "alpha"
+
+        manifest = {"version": 1, "opaque_alpha": opaque_alpha, "atlases": {}, "images": {}}
+        tasks = []
+        for surface_format in ("opaque", "colorkey", "alpha"):
+            group = [info for info in infos if info["format"] == surface_format]
+            for index, page in enumerate(pack(group, page_size)):
+                atlas = f"{atlas_dir}/{surface_format}_{index}.png"
+                manifest["atlases"][atlas] = {"format": surface_format, "colorkey": colorkey if surface_format == "colorkey" else None}
+                placements = []
+                for info, x, y in page["placements"]:
+                    manifest["images"][info["name"]] = {"atlas": atlas, "rect": [x, y] + info["size"], "format": surface_format,
+                                                        "file_size": info["file_size"], "mtime_ns": info["mtime_ns"]}
+                    placements.append((os.path.join(source_dir, info["name"]), x, y))
+                tasks.append((os.path.join(source_dir, atlas), surface_format, manifest["atlases"][atlas]["colorkey"], placements,
+                              page["size"], opaque_alpha))
+        list(executor.map(compose_page, tasks))
+
+    # Remove the pages of an earlier build that this one did not write
+    for name in os.listdir(output_dir):
+        if PAGE_NAME.fullmatch(name) and f"{atlas_dir}/{name}" not in manifest["atlases"]:
+            os.remove(os.path.join(output_dir, name))
+    with open(os.path.join(output_dir, "manifest.json"), "w") as file:
+        json.dump(manifest, file, indent=4)
+    return manifest
+
+
+def main():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    img_dir = os.path.abspath(os.path.join(current_dir, "..", "..", "img"))
+    parser = argparse.ArgumentParser(description="Pack the images into atlases by surface format and write the asset manifest")
+    parser.add_argument("--source", default=img_dir, help="Directory of the source PNGs")
+    parser.add_argument("--output", help="Directory for the atlases and manifest.json (default: atlas/ in the source directory)")
+    parser.add_argument("--page-size", type=int, default=2048, help="Largest width and height of an atlas page")
+    parser.add_argument("--opaque-alpha", type=int, default=224, help="Alpha at or above which a pixel counts as opaque")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU core)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build(args.source, args.output or os.path.join(args.source, "atlas"), args.page_size, args.opaque_alpha, args.workers)
+    formats = [entry["format"] for entry in manifest["images"].values()]
+    print(f"Packed {len(formats)} images into {len(manifest['atlases'])} atlases in {time.perf_counter() - start:.2f}s "
+          f"({formats.count('opaque')} opaque, {formats.count('colorkey')} colorkey, {formats.count('alpha')} alpha)")
+
+
+if __name__ == "__main__":
+    main()
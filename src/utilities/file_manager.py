@@ -2,8 +2,83 @@ import os
 import json
 import pygame
 
+from src.utilities.image_cache import ImageCache
+from src.utilities.level_format import LevelFile
+from src.utilities.log import log
+
 
 class FileManager:
+    # Decoded surfaces and sliced tile frames shared by every sprite in the process
+    image_cache = ImageCache()
+    # JSON files parsed ahead of time by the AssetLoader; each is handed out once, to the first caller
+    preloaded_json = {}
+    # Atlases and surface formats written by the asset pipeline (src/utilities/asset_pipeline.py), read on first use
+    manifest = None
+    manifest_read = False
+
+    @staticmethod
+    def image_files():
+        """Return the names of the images to preload: the atlases of the asset manifest and the images not packed in them."""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        image_dir = os.path.abspath(os.path.join(current_dir, "..", "..", "img"))
+        names = sorted(name for name in os.listdir(image_dir) if name.lower().endswith(".png"))
+        manifest = FileManager.asset_manifest()
+        if manifest is None:
+            return names
+        return list(manifest["atlases"]) + [name for name in names if name not in manifest["images"]]
+
+    @staticmethod
+    def asset_manifest():
+        """Return the manifest of the image atlases, or None if the asset pipeline has not been run."""
+        if not FileManager.manifest_read:
+            FileManager.manifest_read = True
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            file_path = os.path.abspath(os.path.join(current_dir, "..", "..", "img", "atlas", "manifest.json"))
+            try:
+                with open(file_path, "r") as file:
+                    manifest = json.load(file)
+                if manifest.get("version") == 1:
+                    FileManager.manifest = manifest
+                    log.info(f"Successfully loaded the asset manifest from {file_path}")
+                else:
+                    print(f"Warning: ignoring the asset manifest {file_path}, written by another version of the asset pipeline")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"Error: Could not read the asset manifest '{file_path}': {e}")
+        return FileManager.manifest
+
+    @staticmethod
+    def packed_image(filename):
+        """Return the manifest entry of an image packed in an atlas, or None if it is not packed or has changed since."""
+        manifest = FileManager.asset_manifest()
+        entry = manifest["images"].get(filename) if manifest is not None else None
+        if entry is None:
+            return None
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        file_path = os.path.abspath(os.path.join(current_dir, "..", "..", "img", filename))
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return entry  # Only shipped in the atlas
+        if stat.st_size != entry["file_size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            print(f"Warning: '{filename}' changed since the atlases were built; loading it directly")
+            del manifest["images"][filename]
+            return None
+        return entry
+
+    @staticmethod
+    def surface_format(filename):
+        """
+        Return how an image file is best converted for blitting, according to the asset manifest.
+        :return: ("opaque", "colorkey" or "alpha", the color key or None); images the manifest does not describe use alpha.
+        """
+        manifest = FileManager.asset_manifest()
+        atlas = manifest["atlases"].get(filename) if manifest is not None else None
+        if atlas is None:
+            return "alpha", None
+        return atlas["format"], atlas["colorkey"]
+
     @staticmethod
     def load_json_file(filename):
         """
@@ -11,6 +86,14 @@ class FileManager:
         :param filename: The name of the file to load.
         :return: Parsed JSON data if successful, otherwise None.
         """
+        data = FileManager.preloaded_json.pop(filename, None)
+        if data is not None:
+            return data
+        return FileManager.read_json_file(filename)
+
+    @staticmethod
+    def read_json_file(filename):
+        """Read and parse a JSON file from the data directory; safe to call from a loader thread."""
         current_dir = os.path.dirname(os.path.abspath(__file__))  # Get the current file directory (file_manager.py)
         root_dir = os.path.abspath(os.path.join(current_dir, "..", ".."))  # Go up two levels to reach the project root
         file_path = os.path.join(root_dir, "data", filename)  # Construct the full path to the file
@@ -19,7 +102,7 @@ class FileManager:
         try:
             with open(file_path, 'r') as file:
                 data = json.load(file)
-                print(f"Successfully loaded JSON data from {file_path}")
+                log.info(f"Successfully loaded JSON data from {file_path}")
                 return data
         except FileNotFoundError:
             print(f"Error: The JSON file '{filename}' was not found at {file_path}")
@@ -29,23 +112,153 @@ class FileManager:
         # Return None if loading fails
         return None
 
+    @staticmethod
+    def load_level(filename):
+        """
+        Loads a level from the data directory: a binary .lvl file is memory-mapped, anything else is read as JSON rows.
+        :param filename: The name of the level file to load.
+        :return: A LevelFile, a list of rows of tile codes, or None if loading fails.
+        """
+        if not filename.endswith(".lvl"):
+            return FileManager.load_json_file(filename)
+
+        current_dir = os.path.dirname(os.path.abspath(__file__))  # Get the current file directory (file_manager.py)
+        root_dir = os.path.abspath(os.path.join(current_dir, "..", ".."))  # Go up two levels to reach the project root
+        file_path = os.path.join(root_dir, "data", filename)  # Construct the full path to the file
+        try:
+            level = LevelFile(file_path)
+            log.info(f"Successfully loaded level from {file_path}")
+            return level
+        except FileNotFoundError:
+            print(f"Error: The level file '{filename}' was not found at {file_path}")
+        except ValueError as e:
+            print(f"Error: Could not read the level file '{filename}': {e}")
+        return None
+
     @staticmethod
     def load_image(filename):
         """
         Loads an image file using Pygame, with error handling.
+        Decoded surfaces are shared through FileManager.image_cache, so callers must not draw onto them.
         :param filename: The name of the image file to load.
         :return: The loaded image surface if successful, otherwise a default placeholder.
         """
+        image = FileManager.image_cache.get(("image", filename))
+        if image is not None:
+            return image
+        entry = FileManager.packed_image(filename)
+        if entry is not None:
+            return FileManager.image_from_atlas(filename, entry)
+        return FileManager.finish_image(filename, FileManager.decode_image(filename))
+
+    @staticmethod
+    def image_from_atlas(filename, entry):
+        """Cut a packed image out of its atlas, which is loaded (and cached) in the surface format its images need."""
+        atlas = FileManager.load_image(entry["atlas"])
+        image = FileManager.cut_out(atlas, entry["rect"])
+        if image.get_parent() is not None:
+            # A subsurface shares the atlas's pixels, which are accounted for under the atlas's key and kept cached with it
+            FileManager.image_cache.put(("image", filename), image, 0, parent=("image", entry["atlas"]))
+        else:
+            FileManager.image_cache.put(("image", filename), image, ImageCache.surface_bytes(image))
+        return image
+
+    @staticmethod
+    def decode_image(filename):
+        """
+        Decode an image file from the image directory; safe to call from a loader thread.
+        :return: The decoded surface, in its file format, or None if it cannot be loaded.
+        """
         current_dir = os.path.dirname(os.path.abspath(__file__))  # Get the current file directory (file_manager.py)
         root_dir = os.path.abspath(os.path.join(current_dir, "..", ".."))  # Go up two levels to reach the project root
         file_path = os.path.join(root_dir, "img", filename)  # Construct the full path to the file
         try:
-            image = pygame.image.load(file_path).convert_alpha()
-            print(f"Successfully loaded image from {file_path}")
+            image = pygame.image.load(file_path)
+            log.info(f"Successfully loaded image from {file_path}")
             return image
         except pygame.error as e:
             print(f"Error: Could not load the image file '{file_path}'. Pygame error: {e}")
-            # Return a default placeholder surface
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((255, 0, 0))  # Red fill for a missing resource
-            return placeholder
+            return None
+
+    @staticmethod
+    def finish_image(filename, image):
+        """
+        Convert a decoded image to the surface format the asset manifest gives it, and cache it; must run on the main thread.
+        :param filename: The name of the image file.
+        :param image: The decoded surface, or None to cache a placeholder for a missing image.
+        :return: The cached surface.
+        """
+        if image is None:
+            # Use a default placeholder surface
+            image = pygame.Surface((50, 50))
+            image.fill((255, 0, 0))  # Red fill for a missing resource
+        else:
+            image = FileManager.optimize_surface(image, *FileManager.surface_format(filename))
+
+        FileManager.image_cache.put(("image", filename), image, ImageCache.surface_bytes(image))
+        return image
+
+    @staticmethod
+    def optimize_surface(image, surface_format, colorkey=None):
+        """
+        Convert a surface to the display format that blits it fastest: without alpha for opaque images,
+        with a color key for images whose pixels are either opaque or transparent, and with per-pixel alpha otherwise.
+        """
+        if pygame.display.get_surface() is None:
+            # Converting needs a display; headless runs keep the surface in its loaded format
+            if colorkey is not None:
+                image.set_colorkey(colorkey)
+            return image
+        if surface_format == "opaque":
+            return image.convert()
+        if surface_format == "colorkey":
+            image = image.convert()
+            image.set_colorkey(colorkey)
+            return image
+        return image.convert_alpha()
+
+    @staticmethod
+    def cut_out(image, rect):
+        """
+        Return part of an image: a subsurface sharing its pixels when it has per-pixel alpha, otherwise a copy,
+        as subsurfaces without per-pixel alpha blit several times slower and keyed surfaces are run-length encoded.
+        """
+        part = image.subsurface(rect)
+        if image.get_flags() & pygame.SRCALPHA:
+            return part
+        part = part.copy()
+        colorkey = image.get_colorkey()
+        if colorkey is not None:
+            part.set_colorkey(colorkey, pygame.RLEACCEL)
+        return part
+
+    @staticmethod
+    def load_tiles(filename, rows, cols):
+        """
+        Loads an image and cuts it into a grid of tile frames.
+        The frames are cut out of the cached image (see cut_out) and are shared between all callers.
+        :param filename: The name of the image file to load.
+        :param rows: Number of tile rows in the image.
+        :param cols: Number of tile columns in the image.
+        :return: A list of tile surfaces, in row-major order.
+        """
+        key = ("tiles", filename, rows, cols)
+        tiles = FileManager.image_cache.get(key)
+        if tiles is not None:
+            return tiles
+
+        image = FileManager.load_image(filename)
+        tile_width = image.get_width() // cols
+        tile_height = image.get_height() // rows
+        tiles = []
+        for i in range(rows):
+            for j in range(cols):
+                tile_rect = pygame.Rect(j * tile_width, i * tile_height, tile_width, tile_height)
+                tiles.append(FileManager.cut_out(image, tile_rect))
+
+        # Subsurface frames share the pixels of the image, which is already accounted for under its own key
+        # and kept cached with the frames, so only copied frames add memory
+        copied_bytes = sum(ImageCache.surface_bytes(tile) for tile in tiles if tile.get_parent() is None)
+        shares_image = any(tile.get_parent() is not None for tile in tiles)
+        FileManager.image_cache.put(key, tiles, copied_bytes, parent=("image", filename) if shares_image else None)
+        return tiles
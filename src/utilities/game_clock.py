@@ -0,0 +1,31 @@
+import time
+
+
+class GameClock:
+    def __init__(self, start=0.0):
+        """
+        Simulation time, advanced by the fixed tick instead of read from the system clock,
+        so a recorded session replays identically however fast it runs.
+        :param start: Time of the first tick in seconds.
+        """
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance(self, seconds):
+        self.time += seconds
+
+
+class WallClock:
+    """Clock reading the system time, for entities used outside a simulation (e.g. in tools)."""
+
+    def now(self):
+        return time.time()
+
+    def advance(self, seconds):
+        pass
+
+
+# Default clock of entities created without one
+wall_clock = WallClock()
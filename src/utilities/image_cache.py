@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+
+class ImageCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Least-recently-used cache of decoded surfaces, bounded by a byte budget.
+        :param max_bytes: The maximum number of pixel bytes to keep resident.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size in bytes)
+        self.parents = {}  # key -> key of the entry whose pixels it shares, kept at least as recently used
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        """Approximate the pixel memory held by a surface."""
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get(self, key):
+        """Return the cached value for key (marking it as recently used), or None on a miss."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.touch_parent(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size, parent=None):
+        """
+        Store a value and evict the least recently used entries until the budget is respected.
+        :param parent: Key of the entry whose pixels the value shares (e.g. the image it is a subsurface of).
+                       The parent is used whenever the value is, so it is only evicted after the value.
+        """
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+        if parent is not None:
+            self.parents[key] = parent
+            self.touch_parent(key)
+        else:
+            self.parents.pop(key, None)
+        self.evict()
+
+    def touch_parent(self, key):
+        # Walk up the chain, e.g. tile frames -> the image they are cut from -> its atlas
+        parent = self.parents.get(key)
+        while parent is not None and parent in self.entries:
+            self.entries.move_to_end(parent)
+            parent = self.parents.get(parent)
+
+    def evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            key, (_, size) = self.entries.popitem(last=False)
+            self.parents.pop(key, None)
+            self.bytes -= size
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def clear(self):
+        self.entries.clear()
+        self.parents.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Return the cache counters as a dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,152 @@
+import argparse
+import json
+import mmap
+import struct
+
+
+class LevelFile:
+    """
+    Binary level file, read through a memory map so only the pages that are touched get loaded.
+
+    Layout (little endian):
+        header       magic "PCLV", version, layer count, width, height, chunk size
+        layer table  per layer: name (8 bytes, zero padded), offset, size
+        layers       "tiles":    uint8 tile codes, row-major, width * height
+                     "chunks":   chunk index, per chunk (row-major): uint16 enemy count, uint16 door count
+                     "variants": optional uint8 tile variant per cell, 255 for a random variant
+                     "meta":     optional UTF-8 JSON, e.g. {"patrol_routes": {"col,row": [[col, row], ...]}}
+    """
+    MAGIC = b"PCLV"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHIIH")
+    LAYER_ENTRY = struct.Struct("<8sQQ")
+    CHUNK_ENTRY = struct.Struct("<HH")
+    EMPTY = 255  # Tile code padding rows shorter than the widest one; creates nothing
+    ENEMY, DOOR = 4, 5  # Tile codes counted by the chunk index
+
+    def __init__(self, path):
+        """
+        Open a level file. Tile rows are copy-on-write views of the file: changing them never touches the file.
+        :param path: Path of the .lvl file.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, self.version, layer_count, self.width, self.height, self.chunk_size = LevelFile.HEADER.unpack_from(self.buffer, 0)
+        if magic != LevelFile.MAGIC:
+            raise ValueError(f"'{path}' is not a level file")
+        if self.version > LevelFile.VERSION:
+            raise ValueError(f"'{path}' has level format version {self.version}, newer than the supported {LevelFile.VERSION}")
+
+        self.layers = {}  # Layer name -> (offset, size)
+        position = LevelFile.HEADER.size
+        for _ in range(layer_count):
+            name, offset, size = LevelFile.LAYER_ENTRY.unpack_from(self.buffer, position)
+            self.layers[name.rstrip(b"\0").decode("ascii")] = (offset, size)
+            position += LevelFile.LAYER_ENTRY.size
+
+    def layer(self, name):
+        """Return a memoryview of a layer, or None if the file does not have it."""
+        if name not in self.layers:
+            return None
+        offset, size = self.layers[name]
+        return memoryview(self.buffer)[offset:offset + size]
+
+    def rows(self):
+        """Return one writable memoryview of tile codes per row."""
+        tiles = self.layer("tiles")
+        return [tiles[row * self.width:(row + 1) * self.width] for row in range(self.height)]
+
+    def chunk_counts(self, chunk_col, chunk_row):
+        """Return the (enemy count, door count) of a chunk from the chunk index."""
+        chunk_columns = -(-self.width // self.chunk_size)
+        offset = self.layers["chunks"][0] + (chunk_row * chunk_columns + chunk_col) * LevelFile.CHUNK_ENTRY.size
+        return LevelFile.CHUNK_ENTRY.unpack_from(self.buffer, offset)
+
+    def enemy_total(self):
+        """Return the number of enemy cells in the level, from the chunk index alone."""
+        return sum(enemies for enemies, _ in LevelFile.CHUNK_ENTRY.iter_unpack(self.layer("chunks")))
+
+    def find(self, code):
+        """
+        Return the (col, row) of the first cell with a tile code, or None if there is none.
+        The map is searched directly, so only the pages before the cell are read.
+        """
+        offset, size = self.layers["tiles"]
+        index = self.buffer.find(bytes([code]), offset, offset + size)
+        if index < 0:
+            return None
+        return (index - offset) % self.width, (index - offset) // self.width
+
+    def meta(self):
+        meta = self.layer("meta")
+        return json.loads(bytes(meta).decode("utf-8")) if meta is not None else {}
+
+    @staticmethod
+    def write(path, rows, chunk_size=16, variants=None, meta=None):
+        """
+        Save rows of tile codes (the level.json layout) as a binary level file.
+        :param path: Path of the .lvl file to write.
+        :param rows: List of rows of tile codes; shorter rows are padded with LevelFile.EMPTY.
+        :param chunk_size: Number of tiles along each side of an index chunk.
+        :param variants: Optional rows of tile variants, 255 for a random variant.
+        :param meta: Optional JSON-serializable dictionary, e.g. patrol routes and spawn data.
+        """
+        width, height = max(len(row) for row in rows), len(rows)
+        tiles = bytearray([LevelFile.EMPTY]) * (width * height)
+        for row_idx, row in enumerate(rows):
+            tiles[row_idx * width:row_idx * width + len(row)] = bytes(row)
+
+        # Chunk index: enemies and doors per chunk
+        chunk_columns, chunk_rows = -(-width // chunk_size), -(-height // chunk_size)
+        chunks = bytearray()
+        for chunk_row in range(chunk_rows):
+            for chunk_col in range(chunk_columns):
+                enemies = doors = 0
+                for row_idx in range(chunk_row * chunk_size, min((chunk_row + 1) * chunk_size, height)):
+                    start = row_idx * width + chunk_col * chunk_size
+                    cells = tiles[start:start + min(chunk_size, width - chunk_col * chunk_size)]
+                    enemies += cells.count(LevelFile.ENEMY)
+                    doors += cells.count(LevelFile.DOOR)
+                chunks += LevelFile.CHUNK_ENTRY.pack(enemies, doors)
+
+        layers = [("tiles", bytes(tiles)), ("chunks", bytes(chunks))]
+        if variants is not None:
+            variant_layer = bytearray([255]) * (width * height)
+            for row_idx, row in enumerate(variants):
+                variant_layer[row_idx * width:row_idx * width + len(row)] = bytes(row)
+            layers.append(("variants", bytes(variant_layer)))
+        if meta:
+            layers.append(("meta", json.dumps(meta).encode("utf-8")))
+
+        offset = LevelFile.HEADER.size + LevelFile.LAYER_ENTRY.size * len(layers)
+        with open(path, "wb") as file:
+            file.write(LevelFile.HEADER.pack(LevelFile.MAGIC, LevelFile.VERSION, len(layers), width, height, chunk_size))
+            for name, data in layers:
+                file.write(LevelFile.LAYER_ENTRY.pack(name.encode("ascii"), offset, len(data)))
+                offset += len(data)
+            for _, data in layers:
+                file.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a level.json grid of tile codes to the binary level format")
+    parser.add_argument("source", help="Path of the JSON level")
+    parser.add_argument("destination", help="Path of the .lvl file to write")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Tiles per side of an index chunk")
+    parser.add_argument("--meta", help="Optional JSON file with patrol routes and spawn data to embed")
+    args = parser.parse_args()
+
+    with open(args.source, "r") as file:
+        rows = json.load(file)
+    meta = None
+    if args.meta:
+        with open(args.meta, "r") as file:
+            meta = json.load(file)
+    LevelFile.write(args.destination, rows, args.chunk_size, meta=meta)
+    print(f"Converted '{args.source}' ({max(len(row) for row in rows)}x{len(rows)}) to '{args.destination}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+
+
+class LevelGenerator:
+    # Tile codes, as used in level.json
+    FLOOR, PLAYER, WALL_X, WALL_Y, ENEMY, DOOR = 0, 1, 2, 3, 4, 5
+
+    def __init__(self, width, height, wall_density=0.1, enemy_count=50, door_count=10, seed=None):
+        """
+        Generates synthetic levels for stress testing.
+        :param width: Number of columns, including the border walls.
+        :param height: Number of rows, including the border walls.
+        :param wall_density: Fraction of interior cells that become walls.
+        :param enemy_count: Number of enemies to place on free floor cells.
+        :param door_count: Number of doors to place on free floor cells.
+        :param seed: Seed for the random generator, so a level can be reproduced.
+        """
+        if width < 3 or height < 3:
+            raise ValueError("A level needs at least 3x3 tiles")
+        self.width = width
+        self.height = height
+        self.wall_density = wall_density
+        self.enemy_count = enemy_count
+        self.door_count = door_count
+        self.random = random.Random(seed)
+
+    def generate(self):
+        """
+        Build the level grid.
+        :return: A list of rows of tile codes, in the same layout as level.json.
+        """
+        rng = self.random
+        width, height = self.width, self.height
+
+        # Solid border: horizontal walls along the top and bottom, vertical walls on the sides
+        level = [[LevelGenerator.WALL_X] * width]
+        for _ in range(height - 2):
+            row = [LevelGenerator.WALL_Y]
+            for _ in range(width - 2):
+                if rng.random() < self.wall_density:
+                    row.append(LevelGenerator.WALL_X if rng.random() < 0.5 else LevelGenerator.WALL_Y)
+                else:
+                    row.append(LevelGenerator.FLOOR)
+            row.append(LevelGenerator.WALL_Y)
+            level.append(row)
+        level.append([LevelGenerator.WALL_X] * width)
+
+        # Keep the player's start in the middle of the level
+        player_col, player_row = width // 2, height // 2
+        level[player_row][player_col] = LevelGenerator.PLAYER
+
+        self.place(level, LevelGenerator.DOOR, self.door_count)
+        self.place(level, LevelGenerator.ENEMY, self.enemy_count)
+        return level
+
+    def place(self, level, tile_code, count):
+        """Put tile_code on up to count random floor cells."""
+        interior_cells = (self.width - 2) * (self.height - 2)
+        placed = attempts = 0
+        while placed < count and attempts < count * 20 + interior_cells:
+            attempts += 1
+            col = self.random.randint(1, self.width - 2)
+            row = self.random.randint(1, self.height - 2)
+            if level[row][col] == LevelGenerator.FLOOR:
+                level[row][col] = tile_code
+                placed += 1
+        if placed < count:
+            print(f"Warning: only placed {placed} of {count} tiles with code {tile_code}")
+        return placed
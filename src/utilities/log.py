@@ -0,0 +1,18 @@
+class Log:
+    def __init__(self, verbose=False):
+        """
+        Informational messages, such as every file loaded, printed only in verbose mode.
+        Warnings and errors are always printed.
+        """
+        self.verbose = verbose
+
+    def set_verbose(self, verbose):
+        self.verbose = verbose
+
+    def info(self, message):
+        if self.verbose:
+            print(message)
+
+
+# Shared log used by the loaders and the game
+log = Log()
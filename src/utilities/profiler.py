@@ -0,0 +1,175 @@
+import json
+import time
+from collections import deque
+
+import pygame
+
+from src.utilities.text_renderer import text_renderer
+
+
+class NullScope:
+    """Scope returned while profiling is disabled; entering and leaving it does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SCOPE = NullScope()
+
+
+class Scope:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        self.profiler.depth -= 1
+        self.profiler.record(self.name, self.start, end)
+        return False
+
+
+class Profiler:
+    # Colors used by the overlay graph, assigned to top-level scopes in order of appearance
+    COLORS = [(66, 135, 245), (245, 93, 66), (93, 201, 84), (240, 200, 60), (170, 100, 220), (80, 210, 210)]
+
+    def __init__(self, history=240, max_events=200000):
+        """
+        Per-frame timing of named scopes.
+        :param history: Number of frames kept for the overlay graph.
+        :param max_events: Number of scope events kept for trace export.
+        """
+        self.enabled = False
+        self.overlay_visible = False
+        self.enabled_before_overlay = False  # Whether profiling was on before the overlay turned it on
+        self.depth = 0
+        self.frames = deque(maxlen=history)  # Per frame: (frame ms, {top-level scope: ms}, {scope: ms})
+        self.events = deque(maxlen=max_events)  # (name, start, end, depth) for trace export
+        self.current_top_level = {}
+        self.current_totals = {}
+        self.frame_start = None
+        self.origin = time.perf_counter()
+        self.top_level_names = []
+        self.font_size = 20
+
+    def scope(self, name):
+        """Return a context manager timing the enclosed block; a shared no-op when disabled."""
+        if self.enabled:
+            return Scope(self, name)
+        return NULL_SCOPE
+
+    def record(self, name, start, end):
+        elapsed = (end - start) * 1000.0
+        self.current_totals[name] = self.current_totals.get(name, 0.0) + elapsed
+        if self.depth == 0:
+            self.current_top_level[name] = self.current_top_level.get(name, 0.0) + elapsed
+            if name not in self.top_level_names:
+                self.top_level_names.append(name)
+        self.events.append((name, start, end, self.depth))
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.enabled and self.frame_start is not None:
+            frame_ms = (time.perf_counter() - self.frame_start) * 1000.0
+            self.frames.append((frame_ms, self.current_top_level, self.current_totals))
+        self.current_top_level = {}
+        self.current_totals = {}
+        self.frame_start = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.overlay_visible = False
+            self.end_frame()
+
+    def toggle_overlay(self):
+        """Show or hide the frame time graph; showing it turns profiling on, hiding it restores the previous state."""
+        if not self.overlay_visible:
+            self.enabled_before_overlay = self.enabled
+            self.enabled = True
+            self.overlay_visible = True
+        else:
+            self.set_enabled(self.enabled_before_overlay)
+            self.overlay_visible = False
+
+    def export_chrome_trace(self, filename):
+        """
+        Save the recorded scopes in the Chrome trace event format (chrome://tracing, Perfetto).
+        :param filename: Path of the JSON file to write.
+        """
+        trace_events = [
+            {"name": name, "ph": "X", "pid": 0, "tid": 0,
+             "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6, "args": {"depth": depth}}
+            for name, start, end, depth in self.events
+        ]
+        try:
+            with open(filename, "w") as file:
+                json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+            print(f"Profiler trace saved to '{filename}' ({len(trace_events)} events)")
+        except OSError as e:
+            print(f"Error saving profiler trace to '{filename}': {e}")
+
+    def summary(self):
+        """Return the mean milliseconds per frame of every scope over the recorded history."""
+        totals = {}
+        for _, _, frame_totals in self.frames:
+            for name, elapsed in frame_totals.items():
+                totals[name] = totals.get(name, 0.0) + elapsed
+        count = len(self.frames)
+        return {name: total / count for name, total in totals.items()} if count else {}
+
+    def draw_overlay(self, screen, y=60, height=120, ms_scale=33.3, legend_width=190):
+        """Draw a stacked bar per recorded frame, split by top-level scope, with a legend, in the top right corner."""
+        if not self.overlay_visible or not self.frames:
+            return
+        width = self.frames.maxlen * 2
+        x = screen.get_width() - width - legend_width
+
+        pygame.draw.rect(screen, (0, 0, 0), (x, y, width, height))
+        for i, (_, top_level, _) in enumerate(self.frames):
+            bar_bottom = y + height
+            for j, name in enumerate(self.top_level_names):
+                # Frames slower than ms_scale are cut off at the top of the graph
+                bar_height = min(int(top_level.get(name, 0.0) / ms_scale * height), bar_bottom - y)
+                if bar_height > 0:
+                    pygame.draw.rect(screen, Profiler.COLORS[j % len(Profiler.COLORS)], (x + i * 2, bar_bottom - bar_height, 2, bar_height))
+                    bar_bottom -= bar_height
+
+        # Reference line at 16.7 ms (60 FPS)
+        line_y = y + height - int(16.7 / ms_scale * height)
+        pygame.draw.line(screen, (255, 255, 255), (x, line_y), (x + width, line_y))
+        pygame.draw.rect(screen, (255, 255, 255), (x, y, width, height), 1)
+
+        last_frame_ms, last_top_level, last_totals = self.frames[-1]
+        label = text_renderer.render(f"frame {last_frame_ms:.1f} ms", self.font_size, (255, 255, 255), cache=False)
+        screen.blit(label, (x + 4, y + 4))
+        for j, name in enumerate(self.top_level_names):
+            color = Profiler.COLORS[j % len(Profiler.COLORS)]
+            label = text_renderer.render(f"{name} {last_top_level.get(name, 0.0):.1f} ms", self.font_size, color, cache=False)
+            screen.blit(label, (x + width + 10, y + j * 18))
+
+        # The most expensive nested scopes of the last frame
+        nested = sorted((name for name in last_totals if name not in last_top_level), key=last_totals.get, reverse=True)
+        legend_y = y + len(self.top_level_names) * 18 + 6
+        for j, name in enumerate(nested[:5]):
+            label = text_renderer.render(f"{name} {last_totals[name]:.1f} ms", self.font_size, (180, 180, 180), cache=False)
+            screen.blit(label, (x + width + 10, legend_y + j * 18))
+
+
+# Shared profiler used by the game loop and the instrumented subsystems
+profiler = Profiler()
@@ -0,0 +1,66 @@
+import pygame
+
+from src.utilities.profiler import profiler
+
+
+class RenderQueue:
+    # Layers, drawn from the lowest
+    BACKGROUND = 0  # Baked floor, wall and door chunks
+    ENTITIES = 1  # Enemies
+    OVERLAYS = 2  # Enemy casting bars and target highlights
+    PLAYER = 3  # The player, its equipped items and the damage it took
+    HUD = 4
+    LAYERS = 5
+
+    def __init__(self):
+        """
+        Collects what is drawn during a frame and draws it in a few Surface.fblits/blits calls, one per layer,
+        instead of a Python-level blit per sprite.
+        Within a layer, plain blits are drawn first, then blits with an area or blend flags, then rectangles.
+        """
+        self.plain = [[] for _ in range(RenderQueue.LAYERS)]  # (surface, position)
+        self.special = [[] for _ in range(RenderQueue.LAYERS)]  # (surface, position, area, special flags)
+        self.rects = [[] for _ in range(RenderQueue.LAYERS)]  # (color, rect, border width; 0 fills it)
+        self.submitted = 0  # Items drawn by the last flush
+        self.calls = 0  # Blit calls made by the last flush
+        # Surface.fblits (pygame-ce) takes plain (surface, position) pairs with less per-item overhead than blits
+        self.fblits = hasattr(pygame.Surface, "fblits")
+
+    def submit(self, surface, position, layer, area=None, special_flags=0):
+        """
+        Queue a blit.
+        :param position: Top-left screen position.
+        :param layer: One of the layer constants.
+        :param area: Part of the surface to draw; None draws all of it.
+        :param special_flags: Blend flags, as for Surface.blit.
+        """
+        if area is None and not special_flags:
+            self.plain[layer].append((surface, position))
+        else:
+            self.special[layer].append((surface, position, area, special_flags))
+
+    def submit_rect(self, color, rect, layer, width=0):
+        """Queue a rectangle, filled or with a border of the given width."""
+        self.rects[layer].append((color, rect, width))
+
+    def flush(self, screen):
+        """Draw everything queued onto the screen, layer by layer, and empty the queue."""
+        with profiler.scope("render_queue.flush"):
+            self.submitted = self.calls = 0
+            for layer in range(RenderQueue.LAYERS):
+                plain, special, rects = self.plain[layer], self.special[layer], self.rects[layer]
+                if plain:
+                    if self.fblits:
+                        screen.fblits(plain)
+                    else:
+                        screen.blits(plain, False)
+                    self.calls += 1
+                if special:
+                    screen.blits(special, False)
+                    self.calls += 1
+                for color, rect, width in rects:
+                    pygame.draw.rect(screen, color, rect, width)
+                self.submitted += len(plain) + len(special) + len(rects)
+                plain.clear()
+                special.clear()
+                rects.clear()
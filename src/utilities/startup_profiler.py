@@ -0,0 +1,58 @@
+import time
+
+
+class Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StartupProfiler:
+    def __init__(self):
+        """
+        Times the phases of starting the game (imports, window, assets, world) up to its first frame.
+        Phases are always recorded, as there are only a handful; the breakdown is printed when enabled.
+        Phases should not be nested, so that they add up to the time spent starting.
+        """
+        self.enabled = False
+        self.start = time.perf_counter()  # Set when this module is first imported, as early as main runs
+        self.phases = []  # (name, seconds) in the order they ended
+        self.reported = False
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def report(self, milestone):
+        """
+        Print the time from the start to a milestone and the phases that led to it, once.
+        :param milestone: What was reached, e.g. "first frame".
+        """
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        total = time.perf_counter() - self.start
+        print(f"Startup: {milestone} after {total * 1000:.1f} ms")
+        for name, seconds in self.phases:
+            print(f"  {name:<28}{seconds * 1000:9.1f} ms")
+        print(f"  {'other':<28}{(total - sum(seconds for _, seconds in self.phases)) * 1000:9.1f} ms")
+
+
+# Shared startup profiler, enabled with --profile-startup
+startup_profiler = StartupProfiler()
@@ -0,0 +1,69 @@
+import pygame
+
+from src.utilities.image_cache import ImageCache
+
+
+class TextRenderer:
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        """
+        Shared text rendering with cached fonts and cached rendered strings.
+        :param max_bytes: The maximum number of pixel bytes of rendered text to keep resident.
+        """
+        self.fonts = {}  # (face, size) -> pygame.font.Font
+        self.surface_cache = ImageCache(max_bytes)
+
+    def font(self, size, face=None):
+        """
+        Return the font for a face and size, loading it on first use.
+        :param size: Point size of the font.
+        :param face: Path of a font file, or None for pygame's default font.
+        """
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()  # Initialized on first use, so programs that never draw text do not pay for it
+            font = pygame.font.Font(face, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, size, color, antialias=True, face=None, cache=True, premultiplied=False):
+        """
+        Return a surface with the rendered text. The surface is shared, so callers must not draw on it.
+        :param text: The string to render.
+        :param size: Point size of the font.
+        :param color: RGB color of the text.
+        :param antialias: Whether the glyphs are antialiased.
+        :param face: Path of a font file, or None for pygame's default font.
+        :param cache: Keep the surface for later calls; pass False for text that rarely repeats (e.g. live timings),
+                      so it does not evict the strings worth keeping.
+        :param premultiplied: Return the text with its colors premultiplied by alpha, for BLEND_PREMULTIPLIED blits.
+        """
+        if not cache:
+            return self.draw(text, size, color, antialias, face, premultiplied)
+        key = (text, size, tuple(color), antialias, face, premultiplied)
+        surface = self.surface_cache.get(key)
+        if surface is None:
+            surface = self.draw(text, size, color, antialias, face, premultiplied)
+            self.surface_cache.put(key, surface, ImageCache.surface_bytes(surface))
+        return surface
+
+    def draw(self, text, size, color, antialias, face, premultiplied):
+        surface = self.font(size, face).render(text, antialias, color)
+        if premultiplied:
+            surface = surface.convert_alpha().premul_alpha() if pygame.display.get_surface() else surface.premul_alpha()
+        return surface
+
+    def clear(self):
+        self.fonts.clear()
+        self.surface_cache.clear()
+
+    def stats(self):
+        """Return the rendered text cache counters and the number of loaded fonts."""
+        stats = self.surface_cache.stats()
+        stats["fonts"] = len(self.fonts)
+        return stats
+
+
+# Shared text renderer for the HUD, the menus and the profiler overlay
+text_renderer = TextRenderer()